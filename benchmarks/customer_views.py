@@ -0,0 +1,83 @@
+"""
+Load test for the customer read paths, to compare WSGI and ASGI deployments.
+
+Run the app one way, benchmark, then the other way with the same database:
+
+    # sync views behind gunicorn's sync workers (current production setup)
+    gunicorn propane_exchange.wsgi -w 2 -b 127.0.0.1:8000
+
+    # async views behind an ASGI worker (requires `pip install uvicorn`)
+    ASYNC_CUSTOMER_VIEWS=1 gunicorn propane_exchange.asgi -w 2 \
+        -k uvicorn.workers.UvicornWorker -b 127.0.0.1:8000
+
+    python benchmarks/customer_views.py --session <sessionid cookie> \
+        --store 1 --concurrency 200 --requests 5000
+
+Set DEBUG=True (or put a TLS proxy in front) so SECURE_SSL_REDIRECT does not
+answer every request with a redirect. The gap between the two modes grows
+with concurrency and database round-trip time (e.g. a remote Postgres),
+since a sync worker is blocked for every query while an ASGI worker keeps
+serving other requests.
+"""
+import argparse
+import http.client
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+
+def fetch(base_url, path, session):
+    url = urlsplit(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+    started = time.perf_counter()
+    try:
+        conn.request('GET', path, headers={'Cookie': f'sessionid={session}'})
+        response = conn.getresponse()
+        response.read()
+        return response.status, time.perf_counter() - started
+    finally:
+        conn.close()
+
+
+def run(base_url, path, session, concurrency, requests):
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def one(_):
+        status, elapsed = fetch(base_url, path, session)
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    print(
+        f"{path:<24} {requests / wall:8.1f} req/s  "
+        f"p50 {pct(0.50):7.1f} ms  p95 {pct(0.95):7.1f} ms  p99 {pct(0.99):7.1f} ms  "
+        f"mean {statistics.mean(latencies) * 1000:7.1f} ms  status {statuses}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--session', required=True, help="sessionid cookie of a logged-in customer")
+    parser.add_argument('--store', type=int, default=1, help="store id for the store detail page")
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    for path in ['/map/', f'/store/{args.store}/', '/my-orders/', '/notifications/']:
+        run(args.base_url, path, args.session, args.concurrency, args.requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Per-request latency with and without connection reuse.
+
+Serves the given paths in-process through Django's WSGI handler, so every
+request goes through the real request_started/request_finished cycle that
+opens and closes connections. Each path is measured twice: once with
+CONN_MAX_AGE=0, where every request opens its own connection (the old
+behaviour), and once with the connection settings from settings.py
+(persistent connections, or the psycopg pool with DB_POOL=1).
+
+    DATABASE_URL=postgres://... python benchmarks/db_connections.py --requests 500
+    DATABASE_URL=postgres://... DB_POOL=1 python benchmarks/db_connections.py
+
+Run it against the real database host. Connecting to a local SQLite file
+costs almost nothing, whereas a remote Postgres pays a TCP and TLS handshake
+plus authentication on every connect.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'propane_exchange.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.handlers.wsgi import WSGIHandler  # noqa: E402
+from django.db import connections  # noqa: E402
+from store.dbmetrics import connection_stats  # noqa: E402
+
+
+def environ_for(path, session):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '443',
+        'HTTP_HOST': 'localhost',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.url_scheme': 'https',
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': sys.stderr,
+    }
+    if session:
+        environ['HTTP_COOKIE'] = f'sessionid={session}'
+    return environ
+
+
+def run(handler, path, session, requests):
+    latencies = []
+    statuses = {}
+    before = connection_stats()['databases']['default']['connects']
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = handler(environ_for(path, session), lambda status, headers: None)
+        b''.join(response)
+        # What the WSGI server does; fires request_finished
+        response.close()
+        latencies.append(time.perf_counter() - started)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    connects = connection_stats()['databases']['default']['connects'] - before
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    return (
+        f"p50 {pct(0.50):7.2f} ms  p95 {pct(0.95):7.2f} ms  "
+        f"mean {statistics.mean(latencies) * 1000:7.2f} ms  "
+        f"connects/request {connects / requests:5.2f}  status {statuses}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', action='append', help="path to request (repeatable, default /ready/)")
+    parser.add_argument('--session', help="sessionid cookie, for pages that need a login")
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+
+    handler = WSGIHandler()
+    settings_dict = connections['default'].settings_dict
+    configured = {key: settings_dict[key] for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS', 'OPTIONS')}
+    pooled = bool(configured['OPTIONS'].get('pool'))
+    unpooled = {key: value for key, value in configured['OPTIONS'].items() if key != 'pool'}
+    modes = [
+        ('per-request', {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'OPTIONS': unpooled}),
+        ('pool' if pooled else f"persistent ({configured['CONN_MAX_AGE']}s)", configured),
+    ]
+
+    print(f"{connections['default'].vendor} database, {args.requests} requests per path")
+    for path in args.path or ['/ready/']:
+        for label, overrides in modes:
+            connections['default'].close()
+            settings_dict.update(overrides)
+            # Warm the URL resolver, templates and (when reused) the connection
+            handler(environ_for(path, args.session), lambda status, headers: None).close()
+            print(f"{path:<20} {label:<18} {run(handler, path, args.session, args.requests)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,11 @@ pip install -r requirements.txt
 
 python manage.py collectstatic --no-input
 python manage.py migrate
+# Expired sessions; also run this daily from a cron job
+python manage.py purge_sessions
+python manage.py build_catalog_snapshot
+python manage.py rebuild_search_index
+python manage.py warmup --imports
 
 # Create admin user if it doesn't exist
 python manage.py shell << END
@@ -8,9 +8,22 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
+import time
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'propane_exchange.settings')
+# Read by settings: no persistent database connections under ASGI
+os.environ['SERVER_ASGI'] = 'true'
 
+_started = time.perf_counter()
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.WARMUP_ON_START:
+    from store.warmup import close_connections, ensure_warm  # noqa: E402
+    ensure_warm(setup_seconds=time.perf_counter() - _started)
+    # CONN_MAX_AGE is 0 under ASGI and requests run on other threads, so the
+    # connections warm-up opened on this thread would never be used
+    close_connections()
@@ -10,9 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 import dj_database_url
-from decouple import config
+from decouple import config, Csv
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -34,8 +36,18 @@ CSRF_TRUSTED_ORIGINS = [
     'https://prophane.onrender.com',
 ]
 if not DEBUG:
-    STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+    # collectstatic writes content-hashed, pre-compressed copies of static/css
+    # and static/js; WhiteNoise serves the hashed names with immutable,
+    # far-future Cache-Control headers. A {% static %} name missing from the
+    # manifest raises ValueError, so every deploy must run collectstatic
+    # (build.sh does)
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+    }
     SECURE_SSL_REDIRECT = True
+    # The platform's health check calls the readiness probe over plain HTTP
+    SECURE_REDIRECT_EXEMPT = [r'^ready/$']
     SESSION_COOKIE_SECURE = True
     CSRF_COOKIE_SECURE = True
     SECURE_BROWSER_XSS_FILTER = True
@@ -65,17 +77,28 @@ SITE_ID = 1
 
 # Authentication backends
 AUTHENTICATION_BACKENDS = [
-    'django.contrib.auth.backends.ModelBackend',
-    'allauth.account.auth_backends.AuthenticationBackend',
+    'store.backends.ProfileModelBackend',
+    'store.backends.ProfileAuthenticationBackend',
 ]
 
+# The User/UserProfile pair loaded by the backends above is cached per worker
+# and checked against a shared version stamp on every request (store/stamps.py),
+# so saving the user or profile anywhere (role, status, password, is_active)
+# takes effect on the next request in every worker.
+AUTH_USER_CACHE_SIZE = config('AUTH_USER_CACHE_SIZE', default=5000, cast=int)
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=300, cast=int)
+
 MIDDLEWARE = [
+    'store.logs.RequestLogMiddleware',
+    'store.dbmetrics.ConnectionMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', 
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'store.replicas.PrimaryPinMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'store.middleware.CatalogSnapshotMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',  # Moved to end
@@ -100,8 +123,28 @@ TEMPLATES = [
     },
 ]
 
+if not DEBUG:
+    # Compile each template once per worker; `manage.py warmup` and
+    # WARMUP_ON_START fill this cache before traffic arrives
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'propane_exchange.wsgi.application'
 
+# Cold-start warm-up, see store/warmup.py. With WARMUP_ON_START each worker
+# compiles templates, builds the URL resolver and connects to the database
+# while loading, before it accepts requests; /ready/ reports the result.
+WARMUP_ON_START = config('WARMUP_ON_START', default=not DEBUG, cast=bool)
+
+# Serve map, store_detail, my_orders and notifications from store/async_views.py.
+# Only worth enabling under an ASGI server (propane_exchange.asgi).
+ASYNC_CUSTOMER_VIEWS = config('ASYNC_CUSTOMER_VIEWS', default=False, cast=bool)
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
@@ -117,6 +160,99 @@ else:
         }
     }
 
+# Read replicas for the admin and reporting pages, see store/replicas.py.
+# Comma-separated database URLs; each becomes DATABASES['replica_N']. After a
+# write, a client reads from the primary for REPLICA_PIN_SECONDS.
+DATABASE_REPLICAS = []
+for index, url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=Csv())):
+    DATABASES[f'replica_{index}'] = dict(dj_database_url.parse(url), TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(f'replica_{index}')
+DATABASE_ROUTERS = ['store.replicas.ReplicaRouter'] if DATABASE_REPLICAS else []
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=10, cast=int)
+
+# Connection reuse, see store/dbmetrics.py. DB_CONN_MAX_AGE keeps a worker's
+# connection open between requests for that many seconds (0 closes it after
+# each request) and health-checks it before reuse. DB_POOL instead shares a
+# psycopg pool of DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE connections between a
+# worker's threads. It applies to PostgreSQL databases only and needs psycopg
+# 3 with its pool (psycopg[binary,pool] in requirements.txt); setting it
+# without them is a configuration error, not a silent fallback.
+# Under ASGI (asgi.py sets SERVER_ASGI) sync code runs in throwaway threads
+# whose persistent connections would never be reused, so they are closed
+# after every request there.
+SERVER_ASGI = config('SERVER_ASGI', default=False, cast=bool)
+DB_CONN_MAX_AGE = 0 if SERVER_ASGI else config('DB_CONN_MAX_AGE', default=600, cast=int)
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+DB_POOL_MIN_SIZE = config('DB_POOL_MIN_SIZE', default=2, cast=int)
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=10, cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=int)
+if DB_POOL:
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        raise ImproperlyConfigured('DB_POOL needs psycopg 3 with its pool: pip install "psycopg[binary,pool]"')
+
+for database in DATABASES.values():
+    if DB_POOL and database['ENGINE'] == 'django.db.backends.postgresql':
+        # Django's pool replaces persistent connections
+        database['CONN_MAX_AGE'] = 0
+        database.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+        }
+    else:
+        database['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+        database['CONN_HEALTH_CHECKS'] = DB_CONN_MAX_AGE > 0
+
+# Caches
+# `stamps` holds the version stamps that keep per-worker caches coherent, see
+# store/stamps.py. The file-based default is shared by all workers on one host
+# without a cache server; with several hosts set STAMP_CACHE_BACKEND and
+# STAMP_CACHE_LOCATION to a shared cache.
+STAMP_TIMEOUT = config('STAMP_TIMEOUT', default=86400, cast=int)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'stamps': {
+        'BACKEND': config('STAMP_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('STAMP_CACHE_LOCATION', default=os.path.join(tempfile.gettempdir(), 'propane-exchange-stamps')),
+        'OPTIONS': {'MAX_ENTRIES': config('STAMP_CACHE_MAX_ENTRIES', default=10000, cast=int)},
+    },
+}
+
+# Sessions
+# Database store with write coalescing and a per-process LRU in front of it,
+# kept coherent across workers by the `stamps` cache, see store/sessions.py.
+# Run `manage.py purge_sessions` daily from cron (build.sh also runs it).
+SESSION_ENGINE = 'store.sessions'
+SESSION_LOCAL_CACHE_SIZE = config('SESSION_LOCAL_CACHE_SIZE', default=5000, cast=int)
+SESSION_LOCAL_CACHE_TIMEOUT = config('SESSION_LOCAL_CACHE_TIMEOUT', default=30, cast=int)
+SESSION_WRITE_INTERVAL = config('SESSION_WRITE_INTERVAL', default=300, cast=int)
+SESSION_PURGE_BATCH_SIZE = config('SESSION_PURGE_BATCH_SIZE', default=1000, cast=int)
+
+# Read-through cache for Store/PropaneTank rows, see store/cache.py.
+# Set OBJECT_CACHE_SHARED_ALIAS to a CACHES alias to add a cross-worker tier;
+# without it other workers see a change only after OBJECT_CACHE_TIMEOUT.
+OBJECT_CACHE_SIZE = config('OBJECT_CACHE_SIZE', default=2000, cast=int)
+OBJECT_CACHE_TIMEOUT = config('OBJECT_CACHE_TIMEOUT', default=60, cast=int)
+OBJECT_CACHE_SHARED_ALIAS = config('OBJECT_CACHE_SHARED_ALIAS', default='')
+OBJECT_CACHE_SHARED_TIMEOUT = config('OBJECT_CACHE_SHARED_TIMEOUT', default=300, cast=int)
+
+# Token-bucket rate limits on the order endpoints, see store/ratelimit.py.
+# RATELIMIT_SHARED adds a database-backed bucket so limits hold across workers.
+# RATELIMIT_TRUSTED_PROXIES: number of proxies appending to X-Forwarded-For
+# (1 behind Render's load balancer); 0 uses REMOTE_ADDR.
+RATELIMIT_ENABLED = config('RATELIMIT_ENABLED', default=True, cast=bool)
+RATELIMIT_SHARED = config('RATELIMIT_SHARED', default=False, cast=bool)
+RATELIMIT_LOCAL_SIZE = config('RATELIMIT_LOCAL_SIZE', default=10000, cast=int)
+RATELIMIT_TRUSTED_PROXIES = config('RATELIMIT_TRUSTED_PROXIES', default=0, cast=int)
+
+# Most reservations a customer may hold awaiting pickup or approval at once
+# (store.models.claim_reservation_slot); 0 removes the cap.
+MAX_PENDING_RESERVATIONS = config('MAX_PENDING_RESERVATIONS', default=5, cast=int)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -159,10 +295,33 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Pre-rendered catalog snapshots for the map, see store/snapshot.py
+CATALOG_SNAPSHOT_ROOT = config('CATALOG_SNAPSHOT_ROOT', default=os.path.join(BASE_DIR, 'snapshots'))
+CATALOG_SNAPSHOT_URL = '/snapshots/'
+CATALOG_SNAPSHOT_DEBOUNCE = config('CATALOG_SNAPSHOT_DEBOUNCE', default=2.0, cast=float)
+CATALOG_SNAPSHOT_KEEP = config('CATALOG_SNAPSHOT_KEEP', default=5, cast=int)
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Seller document processing, see store/documents.py: worker threads per
+# process (0 processes right after the request commits) and the longest
+# side of the previews shown to admins
+DOCUMENT_WORKERS = config('DOCUMENT_WORKERS', default=2, cast=int)
+DOCUMENT_PREVIEW_SIZE = config('DOCUMENT_PREVIEW_SIZE', default=800, cast=int)
+# Most bytes inflated from a PDF's compressed streams while counting its
+# pages; counting stops there so a decompression bomb cannot exhaust memory
+DOCUMENT_PDF_INFLATE_LIMIT = config('DOCUMENT_PDF_INFLATE_LIMIT', default=64 * 1024 * 1024, cast=int)
+
+# Pickup proofs whose perceptual hashes differ in at most this many of 64
+# bits are shown to admins as possible reuse, see store/proofhash.py
+PROOF_MATCH_DISTANCE = config('PROOF_MATCH_DISTANCE', default=8, cast=int)
+# Each index sync re-reads fingerprints saved this many seconds before the
+# last one it saw: a transaction can commit a row stamped earlier than rows
+# other workers already committed, and worker clocks drift
+PROOF_SYNC_OVERLAP_SECONDS = config('PROOF_SYNC_OVERLAP_SECONDS', default=300, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -219,22 +378,46 @@ ACCOUNT_FORMS = {
 }
 
 # Optional: Logging for debugging (can be removed in production)
+# Logging, see store/logs.py. Loggers only enqueue records; a background
+# thread writes them to stderr as JSON lines carrying the request id and
+# view name. LOG_SAMPLE_RATES keeps that fraction of DEBUG/INFO records per
+# logger ("allauth=0.1,store.requests=0.5"); warnings and errors are always
+# kept. Requests slower than LOG_SLOW_REQUEST_MS are logged as warnings.
+LOG_LEVEL = config('LOG_LEVEL', default='INFO')
+LOG_SAMPLE_RATES = config('LOG_SAMPLE_RATES', default='store.requests=0.1')
+LOG_SLOW_REQUEST_MS = config('LOG_SLOW_REQUEST_MS', default=1000, cast=int)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'request_context': {
+            '()': 'store.logs.RequestContextFilter',
+        },
+        'sampling': {
+            '()': 'store.logs.SamplingFilter',
+            'rates': LOG_SAMPLE_RATES,
+        },
+    },
     'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
+        'queue': {
+            'class': 'store.logs.BackgroundQueueHandler',
+            'stream': 'ext://sys.stderr',
+            'filters': ['request_context', 'sampling'],
         },
     },
     'loggers': {
         'django': {
-            'handlers': ['console'],
-            'level': 'INFO',
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
         },
         'allauth': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
+            'handlers': ['queue'],
+            'level': 'DEBUG' if DEBUG else LOG_LEVEL,
+        },
+        'store': {
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
         },
     },
 }
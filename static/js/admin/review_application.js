@@ -0,0 +1,8 @@
+document.getElementById('statusSelect').addEventListener('change', function() {
+  const rejectionGroup = document.getElementById('rejectionReasonGroup');
+  if (this.value === 'rejected') {
+    rejectionGroup.style.display = 'block';
+  } else {
+    rejectionGroup.style.display = 'none';
+  }
+});
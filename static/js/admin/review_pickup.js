@@ -0,0 +1,3 @@
+function showRejectForm() {
+  document.getElementById('rejectForm').style.display = 'block';
+}
@@ -0,0 +1,236 @@
+// Store data comes from the pre-rendered catalog snapshot (cached by the browser)
+var storesData = [];
+var storeFilter = JSON.parse(document.getElementById("store-filter").textContent);
+// Server-rendered URLs and the CSRF token, from data attributes on #map
+var mapConfig = document.getElementById('map').dataset;
+
+// Initialize map
+var map = L.map('map', {
+  center: [11.706149247057967, 124.42393797354536],
+  zoom: 17,
+  maxZoom: 19,
+  maxBoundsViscosity: 1.0,
+  worldCopyJump: false
+});
+
+L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+  maxZoom: 19
+}).addTo(map);
+
+// Add markers for each store
+var currentStore = null;
+var selectedTanks = {};
+
+fetch(mapConfig.snapshotUrl)
+  .then(function(response) {
+    if (!response.ok) {
+      throw new Error("Catalog snapshot request failed: HTTP " + response.status);
+    }
+    return response.json();
+  })
+  .then(function(snapshot) {
+    storesData = snapshot.stores.filter(function(store) {
+      return storeFilter === null || storeFilter.indexOf(store.id) !== -1;
+    });
+    storesData.forEach(function(store) {
+      var marker = L.marker([store.lat, store.lng]).addTo(map);
+      marker.on("click", function() {
+        openStoreModal(store);
+      });
+    });
+  })
+  .catch(function(error) {
+    console.error(error);
+    alert("⚠️ Could not load the stores. Please refresh the page to try again.");
+  });
+
+function openStoreModal(store) {
+  currentStore = store;
+  selectedTanks = {};
+
+  // Update store info
+  document.getElementById("storeName").textContent = store.name;
+  document.getElementById("storeOwnerName").textContent = "Owner: " + store.owner;
+  document.getElementById("storeDescription").textContent = store.description;
+  document.getElementById("storeOwnerPhoto").src = store.ownerPhoto;
+
+  // Clear and populate tanks
+  var tankGrid = document.getElementById("tankGrid");
+  tankGrid.innerHTML = "";
+
+  if (store.tanks.length === 0) {
+    tankGrid.innerHTML = '<p style="text-align:center; color:#666; grid-column: 1/-1;">No tanks available at this store.</p>';
+  }
+
+  store.tanks.forEach(function(tank) {
+    var stockClass, stockText;
+    var isOutOfStock = tank.stock === 0;
+
+    if (isOutOfStock) {
+      stockClass = 'stock-out';
+      stockText = 'Out of Stock';
+    } else if (tank.stock <= 5) {
+      stockClass = 'stock-low';
+      stockText = 'Low Stock';
+    } else if (tank.stock <= 10) {
+      stockClass = 'stock-medium';
+      stockText = 'Medium Stock';
+    } else {
+      stockClass = 'stock-high';
+      stockText = 'In Stock';
+    }
+
+    var div = document.createElement("div");
+    div.className = "tank-card-new" + (isOutOfStock ? " out-of-stock" : "");
+    div.dataset.tankId = tank.id;
+    div.innerHTML = `
+      <img src="${tank.image}" alt="${tank.type}" class="tank-image-new">
+      <strong>${tank.type}</strong>
+      <div class="tank-price-new">₱${tank.price}</div>
+      <div class="tank-stock-info">
+        <span class="stock-badge ${stockClass}">${stockText}</span>
+        <div style="margin-top: 8px; font-size: 13px; color: #666;">${tank.stock} available</div>
+      </div>
+      ${!isOutOfStock ? `
+        <div class="quantity-controls">
+          <button class="qty-btn" onclick="decreaseQty(${tank.id}); event.stopPropagation();">−</button>
+          <div class="qty-display" id="qty-${tank.id}">0</div>
+          <button class="qty-btn" onclick="increaseQty(${tank.id}, ${tank.stock}); event.stopPropagation();">+</button>
+        </div>
+      ` : ''}
+    `;
+
+    tankGrid.appendChild(div);
+  });
+
+  updateReserveButton();
+  document.getElementById("storeModal").style.display = "flex";
+}
+
+function increaseQty(tankId, maxStock) {
+  if (!selectedTanks[tankId]) {
+    selectedTanks[tankId] = { qty: 0, tank: currentStore.tanks.find(t => t.id === tankId) };
+  }
+
+  if (selectedTanks[tankId].qty < maxStock) {
+    selectedTanks[tankId].qty++;
+    document.getElementById("qty-" + tankId).textContent = selectedTanks[tankId].qty;
+    updateReserveButton();
+  }
+}
+
+function decreaseQty(tankId) {
+  if (selectedTanks[tankId] && selectedTanks[tankId].qty > 0) {
+    selectedTanks[tankId].qty--;
+    document.getElementById("qty-" + tankId).textContent = selectedTanks[tankId].qty;
+
+    if (selectedTanks[tankId].qty === 0) {
+      delete selectedTanks[tankId];
+    }
+
+    updateReserveButton();
+  }
+}
+
+function updateReserveButton() {
+  var hasSelection = Object.keys(selectedTanks).some(key => selectedTanks[key].qty > 0);
+  document.getElementById("reserveBtn").disabled = !hasSelection;
+}
+
+function closeStoreModal() {
+  document.getElementById("storeModal").style.display = "none";
+}
+
+function openReceipt() {
+  var hasItems = Object.keys(selectedTanks).length > 0;
+  if (!hasItems) {
+    alert("⚠️ Please select at least one tank!");
+    return;
+  }
+
+  // Calculate total and build receipt
+  var total = 0;
+  var itemsHTML = '';
+
+  for (var tankId in selectedTanks) {
+    var item = selectedTanks[tankId];
+    var subtotal = item.tank.price * item.qty;
+    total += subtotal;
+
+    itemsHTML += `
+      <div class="receipt-item">
+        <span>${item.tank.type} (x${item.qty})</span>
+        <strong>₱${subtotal}</strong>
+      </div>
+    `;
+  }
+
+  document.getElementById("receiptStore").textContent = currentStore.name;
+  document.getElementById("receiptItems").innerHTML = itemsHTML;
+  document.getElementById("receiptTotal").textContent = total;
+  document.getElementById("buyerName").value = "";
+
+  document.getElementById("storeModal").style.display = "none";
+  document.getElementById("receiptModal").style.display = "flex";
+
+  // One key per checkout: repeated "Confirm Purchase" taps and retries
+  // replay the same order instead of placing a new one
+  checkoutKey = newIdempotencyKey();
+}
+
+var checkoutKey = null;
+
+function newIdempotencyKey() {
+  if (window.crypto && crypto.randomUUID) {
+    return crypto.randomUUID();
+  }
+  return Date.now().toString(36) + Math.random().toString(36).slice(2);
+}
+
+function confirmPurchase() {
+  var buyer = document.getElementById("buyerName").value.trim();
+  if (!buyer) {
+    alert("⚠️ Please enter your name!");
+    return;
+  }
+
+  // Submit each tank reservation
+  var form = document.createElement('form');
+  form.method = 'POST';
+  form.action = mapConfig.reserveUrl.replace('0', Object.keys(selectedTanks)[0]);
+
+  var csrfToken = document.createElement('input');
+  csrfToken.type = 'hidden';
+  csrfToken.name = 'csrfmiddlewaretoken';
+  csrfToken.value = mapConfig.csrfToken;
+
+  var nameInput = document.createElement('input');
+  nameInput.type = 'hidden';
+  nameInput.name = 'name';
+  nameInput.value = buyer;
+
+  // Add quantity if needed (you may need to modify your backend)
+  var qtyInput = document.createElement('input');
+  qtyInput.type = 'hidden';
+  qtyInput.name = 'quantity';
+  qtyInput.value = selectedTanks[Object.keys(selectedTanks)[0]].qty;
+
+  var keyInput = document.createElement('input');
+  keyInput.type = 'hidden';
+  keyInput.name = 'idempotency_key';
+  keyInput.value = checkoutKey || newIdempotencyKey();
+
+  form.appendChild(csrfToken);
+  form.appendChild(nameInput);
+  form.appendChild(qtyInput);
+  form.appendChild(keyInput);
+  document.body.appendChild(form);
+  form.submit();
+}
+
+// Close modals by clicking background
+document.querySelectorAll(".modal").forEach(m => {
+  m.addEventListener("click", function(e) {
+    if (e.target === m) m.style.display = "none";
+  });
+});
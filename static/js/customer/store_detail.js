@@ -0,0 +1,17 @@
+// Give each reservation form a key on its first submit, so double taps
+// and retries of the same submission replay the original order
+document.querySelectorAll('.reserve-form').forEach(function(form) {
+  form.addEventListener('submit', function() {
+    var key = form.querySelector('[name="idempotency_key"]');
+    if (!key.value) {
+      key.value = (window.crypto && crypto.randomUUID) ? crypto.randomUUID() : Date.now().toString(36) + Math.random().toString(36).slice(2);
+    }
+  });
+});
+
+// A page restored from the back/forward cache is a new purchase
+window.addEventListener('pageshow', function(e) {
+  if (e.persisted) {
+    document.querySelectorAll('.reserve-form [name="idempotency_key"]').forEach(function(key) { key.value = ''; });
+  }
+});
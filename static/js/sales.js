@@ -0,0 +1,27 @@
+// Sales charts from the daily rollup
+var report = JSON.parse(document.getElementById('sales-report').textContent);
+
+new Chart(document.getElementById('dailyChart'), {
+  data: {
+    labels: report.daily.map(function(d) { return d.day; }),
+    datasets: [
+      {type: 'bar', label: 'Revenue (₱)', data: report.daily.map(function(d) { return d.revenue; }), backgroundColor: '#FF8C42', yAxisID: 'revenue'},
+      {type: 'line', label: 'Orders', data: report.daily.map(function(d) { return d.orders; }), borderColor: '#023E8A', yAxisID: 'orders'}
+    ]
+  },
+  options: {
+    scales: {
+      revenue: {position: 'left', beginAtZero: true},
+      orders: {position: 'right', beginAtZero: true, grid: {drawOnChartArea: false}, ticks: {precision: 0}}
+    }
+  }
+});
+
+new Chart(document.getElementById('typeChart'), {
+  type: 'bar',
+  data: {
+    labels: report.by_type.map(function(t) { return t.tank_type; }),
+    datasets: [{label: 'Revenue by tank type (₱)', data: report.by_type.map(function(t) { return t.revenue; }), backgroundColor: '#00B4D8'}]
+  },
+  options: {indexAxis: 'y'}
+});
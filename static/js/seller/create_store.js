@@ -0,0 +1,95 @@
+// Photo preview
+document.getElementById('id_owner_photo').addEventListener('change', function(e) {
+  var file = e.target.files[0];
+  if (file) {
+    var reader = new FileReader();
+    reader.onload = function(e) {
+      var preview = document.getElementById('photoPreview');
+      preview.src = e.target.result;
+      preview.style.display = 'block';
+    }
+    reader.readAsDataURL(file);
+  }
+});
+
+// Initialize map
+var bounds = L.latLngBounds(
+  [11.703424206095782, 124.42041594897537],
+  [11.707838387133082, 124.42834292722303]
+);
+
+var map = L.map('map').setView([11.706149247057967, 124.42393797354536], 17);
+
+L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+  maxZoom: 19
+}).addTo(map);
+
+var marker = null;
+
+// Get user's location automatically
+if (navigator.geolocation) {
+  navigator.geolocation.getCurrentPosition(function(position) {
+    var lat = position.coords.latitude;
+    var lng = position.coords.longitude;
+
+    // Check if within bounds
+    if (lat >= bounds.getSouth() && lat <= bounds.getNorth() && 
+        lng >= bounds.getWest() && lng <= bounds.getEast()) {
+      map.setView([lat, lng], 17);
+      placeMarker(lat, lng);
+    }
+  });
+}
+
+map.on('click', function(e) {
+  placeMarker(e.latlng.lat, e.latlng.lng);
+});
+
+function placeMarker(lat, lng) {
+  if (marker) {
+    marker.setLatLng([lat, lng]);
+  } else {
+    marker = L.marker([lat, lng]).addTo(map);
+  }
+
+  document.getElementById('id_latitude').value = lat;
+  document.getElementById('id_longitude').value = lng;
+}
+
+// Show/hide tank sections based on checkbox selection
+document.querySelectorAll('input[type="checkbox"]').forEach(function(checkbox) {
+  checkbox.addEventListener('change', function() {
+    var value = this.value;
+    var sectionId = '';
+
+    if (value === 'A/S Valve Gasul') {
+      sectionId = 'as-valve-section';
+    } else if (value === 'POL Valve Gasul') {
+      sectionId = 'pol-valve-section';
+    } else if (value === 'Price Gas') {
+      sectionId = 'price-gas-section';
+    }
+
+    var section = document.getElementById(sectionId);
+    if (this.checked) {
+      section.classList.add('active');
+    } else {
+      section.classList.remove('active');
+    }
+  });
+});
+
+// Validate form
+document.getElementById('storeForm').addEventListener('submit', function(e) {
+  if (!document.getElementById('id_latitude').value) {
+    e.preventDefault();
+    alert('Please click on the map to set your store location!');
+    return false;
+  }
+
+  if (!document.getElementById('id_owner_photo').files.length) {
+    e.preventDefault();
+    alert('Please upload your photo! This is required.');
+    return false;
+  }
+});
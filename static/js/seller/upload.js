@@ -0,0 +1,106 @@
+const uploadSection = document.getElementById('uploadSection');
+const fileInput = document.getElementById('pickupProof');
+const previewContainer = document.getElementById('previewContainer');
+const imagePreview = document.getElementById('imagePreview');
+const submitBtn = document.getElementById('submitBtn');
+const progressContainer = document.getElementById('progressContainer');
+const progressBar = document.getElementById('progressBar');
+const fileInfo = document.getElementById('fileInfo');
+const fileName = document.getElementById('fileName');
+const fileSize = document.getElementById('fileSize');
+const uploadForm = document.getElementById('uploadForm');
+
+// Drag and drop
+uploadSection.addEventListener('dragover', (e) => {
+  e.preventDefault();
+  uploadSection.classList.add('dragover');
+});
+
+uploadSection.addEventListener('dragleave', () => {
+  uploadSection.classList.remove('dragover');
+});
+
+uploadSection.addEventListener('drop', (e) => {
+  e.preventDefault();
+  uploadSection.classList.remove('dragover');
+
+  const files = e.dataTransfer.files;
+  if (files.length > 0) {
+    fileInput.files = files;
+    handleFileSelect(files[0]);
+  }
+});
+
+// File input change
+fileInput.addEventListener('change', (e) => {
+  if (e.target.files.length > 0) {
+    handleFileSelect(e.target.files[0]);
+  }
+});
+
+function handleFileSelect(file) {
+  // Validate file type
+  const validTypes = ['image/jpeg', 'image/jpg', 'image/png'];
+  if (!validTypes.includes(file.type)) {
+    alert('❌ Please upload only JPG, JPEG, or PNG images!');
+    fileInput.value = '';
+    return;
+  }
+
+  // Validate file size (5MB)
+  if (file.size > 5 * 1024 * 1024) {
+    alert('❌ File size must be less than 5MB!');
+    fileInput.value = '';
+    return;
+  }
+
+  // Show file info
+  fileInfo.style.display = 'block';
+  fileName.textContent = file.name;
+  fileSize.textContent = `Size: ${(file.size / 1024 / 1024).toFixed(2)} MB`;
+
+  // Show preview
+  const reader = new FileReader();
+  reader.onload = (e) => {
+    imagePreview.src = e.target.result;
+    previewContainer.style.display = 'block';
+    submitBtn.style.display = 'block';
+  };
+  reader.readAsDataURL(file);
+}
+
+// Form submission with progress
+uploadForm.addEventListener('submit', (e) => {
+  e.preventDefault();
+
+  if (!fileInput.files.length) {
+    alert('❌ Please select an image to upload!');
+    return;
+  }
+
+  submitBtn.disabled = true;
+  submitBtn.textContent = '⏳ Uploading...';
+  progressContainer.style.display = 'block';
+
+  // Simulate upload progress
+  let progress = 0;
+  const interval = setInterval(() => {
+    progress += 10;
+    progressBar.style.width = progress + '%';
+    progressBar.textContent = progress + '%';
+
+    if (progress >= 90) {
+      clearInterval(interval);
+    }
+  }, 100);
+
+  // Submit form
+  setTimeout(() => {
+    clearInterval(interval);
+    progressBar.style.width = '100%';
+    progressBar.textContent = '100%';
+
+    // Actually submit the form
+    uploadForm.submit();
+  }, 1500);
+});
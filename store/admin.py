@@ -1,12 +1,108 @@
+import calendar
+from datetime import datetime
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+from django.utils.functional import cached_property
 from .models import Store, PropaneTank, Reservation, Notification
 
 
+# ==================== LARGE-TABLE HELPERS ====================
+class EstimatedCountPaginator(Paginator):
+    """Paginator that reads the planner's row estimate for unfiltered PostgreSQL changelists.
+
+    COUNT(*) over tens of millions of rows is a full scan; pg_class.reltuples
+    is kept close enough by autovacuum for a page count. A partitioned or
+    inherited table keeps its rows in the child tables, so the estimate sums
+    the whole pg_inherits tree (never-analyzed tables report -1). Filtered
+    lists and other databases still count exactly.
+    """
+    ESTIMATE_SQL = """
+        WITH RECURSIVE tables(oid) AS (
+            SELECT %s::regclass::oid
+            UNION ALL
+            SELECT inhrelid FROM pg_inherits JOIN tables ON inhparent = tables.oid
+        )
+        SELECT COALESCE(SUM(GREATEST(reltuples, 0)), 0)::bigint
+        FROM pg_class JOIN tables USING (oid)
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if connection.vendor == 'postgresql' and query is not None and not query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(self.ESTIMATE_SQL, [self.object_list.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] > 0:
+                return row[0]
+        return super().count
+
+
+class CreatedMonthFilter(admin.SimpleListFilter):
+    """Year -> month drill-down on created_at.
+
+    Replaces date_hierarchy, whose SELECT DISTINCT over truncated dates
+    reads the whole table. The choices come from MIN/MAX(created_at), which
+    the created_at index answers directly, and the filter itself is a range
+    scan on that index.
+    """
+    title = 'created'
+    parameter_name = 'created'
+
+    def _bounds(self, model):
+        bounds = model._default_manager.aggregate(first=Min('created_at'), last=Max('created_at'))
+        if bounds['first'] is None:
+            return None
+        return timezone.localtime(bounds['first']), timezone.localtime(bounds['last'])
+
+    def _range(self):
+        value = self.value() or ''
+        try:
+            year, _, month = value.partition('-')
+            year = int(year)
+            month = int(month) if month else None
+            if month is None:
+                start, end = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+            else:
+                start = datetime(year, month, 1)
+                end = datetime(year + month // 12, month % 12 + 1, 1)
+        except ValueError:
+            return None
+        return timezone.make_aware(start), timezone.make_aware(end), year, month
+
+    def lookups(self, request, model_admin):
+        bounds = self._bounds(model_admin.model)
+        if bounds is None:
+            return []
+        first, last = bounds
+        choices = []
+        selected = self._range()
+        for year in range(last.year, first.year - 1, -1):
+            choices.append((str(year), str(year)))
+            if selected and selected[2] == year:
+                first_month = first.month if year == first.year else 1
+                last_month = last.month if year == last.year else 12
+                for month in range(last_month, first_month - 1, -1):
+                    choices.append((f"{year}-{month:02d}", f"\u2003{calendar.month_name[month]} {year}"))
+        return choices
+
+    def queryset(self, request, queryset):
+        selected = self._range()
+        if selected is None:
+            return queryset
+        start, end, _, _ = selected
+        return queryset.filter(created_at__gte=start, created_at__lt=end)
+
+
 @admin.register(Store)
 class StoreAdmin(admin.ModelAdmin):
     list_display = ('name', 'owner', 'latitude', 'longitude', 'tank_count', 'created_at')
     search_fields = ('name', 'owner__username')
     list_filter = ('created_at', 'owner')
+    list_select_related = ('owner',)
     list_per_page = 20
     readonly_fields = ('created_at',)
     
@@ -22,9 +118,13 @@ class StoreAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(tank_count=Count('tanks'))
+    
     def tank_count(self, obj):
-        return obj.tanks.count()
+        return obj.tank_count
     tank_count.short_description = 'Number of Tanks'
+    tank_count.admin_order_field = 'tank_count'
 
 
 @admin.register(PropaneTank)
@@ -33,6 +133,7 @@ class PropaneTankAdmin(admin.ModelAdmin):
     list_filter = ('store', 'tank_type', 'is_active')
     search_fields = ('tank_type', 'store__name', 'store__owner__username')
     list_editable = ('stock', 'price', 'is_active')
+    list_select_related = ('store__owner',)
     list_per_page = 20
     
     fieldsets = (
@@ -48,6 +149,7 @@ class PropaneTankAdmin(admin.ModelAdmin):
     def store_owner(self, obj):
         return obj.store.owner.username
     store_owner.short_description = 'Store Owner'
+    store_owner.admin_order_field = 'store__owner__username'
     
     def stock_status(self, obj):
         if obj.stock == 0:
@@ -64,18 +166,20 @@ class PropaneTankAdmin(admin.ModelAdmin):
 @admin.register(Reservation)
 class ReservationAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'name', 'store', 'store_owner', 'tank', 'created_at', 'total_price', 'is_notified')
-    list_filter = ('store', 'created_at', 'tank__tank_type', 'is_notified')
+    list_filter = ('store', CreatedMonthFilter, 'tank_type', 'is_notified')
     search_fields = ('user__username', 'name', 'store__name', 'store__owner__username')
-    readonly_fields = ('user', 'store', 'tank', 'name', 'created_at', 'is_notified')
-    date_hierarchy = 'created_at'
+    readonly_fields = ('user', 'store', 'tank', 'tank_type', 'unit_price', 'quantity', 'name', 'created_at', 'is_notified')
+    list_select_related = ('user', 'store__owner', 'tank__store')
     list_per_page = 20
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Customer Information', {
             'fields': ('user', 'name')
         }),
         ('Reservation Details', {
-            'fields': ('store', 'tank', 'created_at')
+            'fields': ('store', 'tank', 'tank_type', 'unit_price', 'quantity', 'created_at')
         }),
         ('Notification Status', {
             'fields': ('is_notified',)
@@ -85,9 +189,10 @@ class ReservationAdmin(admin.ModelAdmin):
     def store_owner(self, obj):
         return obj.store.owner.username
     store_owner.short_description = 'Store Owner'
+    store_owner.admin_order_field = 'store__owner__username'
     
     def total_price(self, obj):
-        return f'₱{obj.tank.price}'
+        return f'₱{obj.total_price}'
     total_price.short_description = 'Price'
     
     def has_add_permission(self, request):
@@ -102,11 +207,13 @@ class ReservationAdmin(admin.ModelAdmin):
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'message_preview', 'reservation', 'is_read', 'created_at')
-    list_filter = ('is_read', 'created_at')
+    list_filter = ('is_read', CreatedMonthFilter)
     search_fields = ('user__username', 'message')
     readonly_fields = ('user', 'message', 'reservation', 'created_at')
-    date_hierarchy = 'created_at'
+    list_select_related = ('user', 'reservation__user')
     list_per_page = 20
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Notification Details', {
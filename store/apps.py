@@ -8,3 +8,6 @@ class YourAppConfig(AppConfig):
     def ready(self):
         # Import models to register signals
         import store  # Replace with your actual app name
+        from . import snapshot  # noqa: F401  (rebuilds the map snapshot on catalog changes)
+        from . import search  # noqa: F401  (keeps search documents up to date)
+        from . import rollups  # noqa: F401  (maintains the daily sales rollup)
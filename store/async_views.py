@@ -0,0 +1,101 @@
+"""
+Async versions of the customer read paths (map, store detail, orders,
+notifications), enabled with ASYNC_CUSTOMER_VIEWS when serving through
+propane_exchange.asgi.
+
+They render the same templates with the same context as store.views, but
+load the user with request.auser() and query through the async ORM, so an
+ASGI worker is not tied up while the database answers. Everything the
+templates touch is loaded up front; sync ORM access from an async view
+raises SynchronousOnlyOperation.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.http import Http404
+from django.shortcuts import render
+from django.views.decorators.cache import cache_control
+from .catalog import aget_store, aget_store_tanks, afilter_store_ids
+from .decorators import async_condition
+from .etags import amap_etag, astore_detail_etag, amy_orders_etag
+from .models import Notification, Reservation, bump_versions
+from .snapshot import acurrent_snapshot_url
+from .views import parse_map_filters
+
+
+async def _auth_user(request):
+    # Swap the lazy sync user for the loaded one, so templates reading
+    # request.user.profile never hit the database
+    request.user = await request.auser()
+    return request.user
+
+
+async def _unread_count(user):
+    return await Notification.objects.filter(user=user, is_read=False).acount()
+
+
+# ==================== CUSTOMER PORTAL ====================
+@login_required
+@cache_control(private=True, no_cache=True)
+@async_condition(amap_etag)
+async def map(request):
+    """Customer view - Browse and buy (HOMEPAGE)"""
+    user = await _auth_user(request)
+    filters = parse_map_filters(request)
+    store_filter = None
+    if filters:
+        store_filter = sorted(await afilter_store_ids(**filters))
+    
+    return render(request, "customer/map.html", {
+        "snapshot_url": await acurrent_snapshot_url(),
+        "store_filter": store_filter,
+        "unread_count": await _unread_count(user)
+    })
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@async_condition(astore_detail_etag)
+async def store_detail(request, store_id):
+    """Customer views store details and available tanks"""
+    user = await _auth_user(request)
+    store = await aget_store(store_id)
+    if store is None or not store.is_active:
+        raise Http404("Store not found")
+    tanks = [tank for tank in await aget_store_tanks(store_id) if tank.is_active and tank.stock > 0]
+    
+    return render(request, "customer/store_detail.html", {
+        "store": store,
+        "tanks": tanks,
+        "unread_count": await _unread_count(user)
+    })
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@async_condition(amy_orders_etag)
+async def my_orders(request):
+    """Customer orders"""
+    user = await _auth_user(request)
+    orders = [
+        order async for order in Reservation.objects.filter(user=user)
+        .select_related('store').order_by('-created_at')
+    ]
+    
+    return render(request, "customer/my_orders.html", {
+        "orders": orders,
+        "unread_count": await _unread_count(user)
+    })
+
+@login_required
+async def notifications(request):
+    """View all notifications"""
+    user = await _auth_user(request)
+    
+    # Mark all as read
+    if await Notification.objects.filter(user=user, is_read=False).aupdate(is_read=True):
+        await sync_to_async(bump_versions)(f"user:{user.pk}")
+    
+    notifications = [n async for n in Notification.objects.filter(user=user).order_by('-created_at')]
+    
+    return render(request, "notifications.html", {
+        "notifications": notifications,
+        "unread_count": 0
+    })
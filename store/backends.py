@@ -0,0 +1,34 @@
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from allauth.account.auth_backends import AuthenticationBackend
+from .cache import aload_user, load_user
+
+
+class ProfileUserMixin:
+    """Load request.user together with its UserProfile in a single query.
+
+    The pair is cached per worker and served only while its version stamp
+    (store.stamps) is current; signals in models.py bump the stamp whenever
+    the user or profile is saved or deleted, so a role change, suspension,
+    password change or deactivation reaches every worker on its next request
+    and ordinary pages, including role checks, cost no query for the user.
+    """
+    def get_user(self, user_id):
+        def loader():
+            return User._default_manager.select_related('profile').filter(pk=user_id).first()
+        user = load_user(user_id, loader)
+        return user if user is not None and self.user_can_authenticate(user) else None
+    
+    async def aget_user(self, user_id):
+        def loader():
+            return User._default_manager.select_related('profile').filter(pk=user_id).afirst()
+        user = await aload_user(user_id, loader)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+
+class ProfileModelBackend(ProfileUserMixin, ModelBackend):
+    """Username/password backend used by the custom login and signup views"""
+
+
+class ProfileAuthenticationBackend(ProfileUserMixin, AuthenticationBackend):
+    """allauth backend (username/email and social logins)"""
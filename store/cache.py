@@ -0,0 +1,275 @@
+import threading
+import time
+from collections import OrderedDict
+import itertools
+import pickle
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.dispatch import Signal
+from . import stamps
+
+
+class LRUCache:
+    """Thread-safe, size-bounded in-process LRU map with an optional TTL.
+
+    Entries live only in the current worker, so callers must either
+    invalidate them on write or tolerate staleness up to `timeout` seconds.
+    """
+    def __init__(self, max_entries, timeout=None):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, expires = self._data[key]
+            except KeyError:
+                return default
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.timeout if self.timeout else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ObjectCache:
+    """Versioned read-through cache: local LRU, then an optional shared tier.
+
+    Readers take a stamp before loading from the database and store the
+    result under it; invalidate() records a newer version for the key, so a
+    slow reader that raced a write can never publish a stale row. Local
+    versions live in this process only and are bounded: the oldest are
+    forgotten, raising a floor that every older entry must also beat.
+
+    The shared tier is any Django cache alias. It keeps a version per key,
+    and local entries remember the shared version they were read at, so an
+    invalidation in another worker drops them on its next lookup. Without a
+    shared tier other workers only notice once `timeout` expires.
+
+    Invalidations made inside a transaction are published when it commits,
+    so no worker reloads the old row in the meantime.
+    """
+    MISSING = object()
+
+    def __init__(self, max_entries, timeout, shared_alias=None, shared_timeout=None):
+        self.local = LRUCache(max_entries, timeout=timeout)
+        self.shared_alias = shared_alias
+        self.shared_timeout = shared_timeout
+        self._versions = OrderedDict()
+        self._floor = 0
+        self._lock = threading.Lock()
+        self._counter = itertools.count(1)
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    def _cached(self, key, shared_version):
+        entry = self.local.get(key)
+        if entry is None:
+            return self.MISSING
+        stamp, entry_shared_version, value = entry
+        with self._lock:
+            version = self._versions.get(key, self._floor)
+        if stamp < version or entry_shared_version != shared_version:
+            return self.MISSING
+        return value
+
+    def get(self, key, loader):
+        stamp = next(self._counter)
+        shared = self.shared
+        shared_version = shared.get(f"ver:{key}", 0) if shared is not None else None
+        value = self._cached(key, shared_version)
+        if value is not self.MISSING:
+            self.hits += 1
+            return value
+
+        if shared is not None:
+            value = shared.get(f"obj:{key}:{shared_version}", self.MISSING)
+            if value is not self.MISSING:
+                self.shared_hits += 1
+                self.local.set(key, (stamp, shared_version, value))
+                return value
+
+        self.misses += 1
+        value = loader()
+        self.local.set(key, (stamp, shared_version, value))
+        if shared is not None:
+            shared.set(f"obj:{key}:{shared_version}", value, self.shared_timeout)
+        return value
+
+    async def aget(self, key, loader):
+        """get() for async views; `loader` returns an awaitable"""
+        stamp = next(self._counter)
+        shared = self.shared
+        shared_version = await shared.aget(f"ver:{key}", 0) if shared is not None else None
+        value = self._cached(key, shared_version)
+        if value is not self.MISSING:
+            self.hits += 1
+            return value
+
+        if shared is not None:
+            value = await shared.aget(f"obj:{key}:{shared_version}", self.MISSING)
+            if value is not self.MISSING:
+                self.shared_hits += 1
+                self.local.set(key, (stamp, shared_version, value))
+                return value
+
+        self.misses += 1
+        value = await loader()
+        self.local.set(key, (stamp, shared_version, value))
+        if shared is not None:
+            await shared.aset(f"obj:{key}:{shared_version}", value, self.shared_timeout)
+        return value
+
+    def _bump_local(self, keys):
+        with self._lock:
+            for key in keys:
+                self._versions[key] = next(self._counter)
+                self._versions.move_to_end(key)
+            while len(self._versions) > self.local.max_entries:
+                _, version = self._versions.popitem(last=False)
+                self._floor = max(self._floor, version)
+        for key in keys:
+            self.local.delete(key)
+
+    def _bump(self, keys):
+        self._bump_local(keys)
+        shared = self.shared
+        if shared is None:
+            return
+        for key in keys:
+            shared.add(f"ver:{key}", 0, None)
+            try:
+                shared.incr(f"ver:{key}")
+            except ValueError:
+                # Evicted between add() and incr(); any new value retires the old entries
+                shared.set(f"ver:{key}", next(self._counter), None)
+
+    def invalidate(self, *keys):
+        """Drop `keys` here now and everywhere once the current transaction commits"""
+        if transaction.get_connection().in_atomic_block:
+            # Reads later in this transaction must not see the cached rows either
+            self._bump_local(keys)
+        transaction.on_commit(lambda: self._bump(keys))
+
+    def stats(self):
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "entries": len(self.local),
+            "max_entries": self.local.max_entries,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.shared_hits) / lookups, 3) if lookups else None,
+        }
+
+
+# ==================== STORE / TANK CATALOG CACHE ====================
+catalog_cache = ObjectCache(
+    settings.OBJECT_CACHE_SIZE,
+    settings.OBJECT_CACHE_TIMEOUT,
+    shared_alias=settings.OBJECT_CACHE_SHARED_ALIAS or None,
+    shared_timeout=settings.OBJECT_CACHE_SHARED_TIMEOUT,
+)
+
+ACTIVE_STORES_KEY = "stores:active"
+
+# Sent whenever cached store/tank data is invalidated, i.e. the catalog changed
+catalog_changed = Signal()
+
+
+def store_key(store_id):
+    return f"store:{store_id}"
+
+
+def store_tanks_key(store_id):
+    return f"store:{store_id}:tanks"
+
+
+def tank_key(tank_id):
+    return f"tank:{tank_id}"
+
+
+def invalidate_store(store_id):
+    catalog_cache.invalidate(store_key(store_id), store_tanks_key(store_id), ACTIVE_STORES_KEY)
+    catalog_changed.send(sender=None, store_id=store_id)
+
+
+def invalidate_tank(tank_id, store_id):
+    catalog_cache.invalidate(tank_key(tank_id), store_tanks_key(store_id), ACTIVE_STORES_KEY)
+    catalog_changed.send(sender=None, store_id=store_id)
+
+
+# ==================== AUTHENTICATED USER CACHE ====================
+# Pickled so a request that modifies request.user never changes the cached copy
+local_users = LRUCache(settings.AUTH_USER_CACHE_SIZE, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+
+
+def user_stamp(user_id):
+    return f"auth:user:{user_id}"
+
+
+def _cached_user(user_id, stamp):
+    entry = local_users.get(user_id)
+    if entry is None or entry[0] != stamp:
+        return None
+    return pickle.loads(entry[1])
+
+
+def get_cached_user(user_id):
+    """Return the cached User (with its profile already loaded) or None"""
+    return _cached_user(user_id, stamps.current(user_stamp(user_id)))
+
+
+def load_user(user_id, loader):
+    """The User for `user_id` from this worker's cache, else loader() (None when missing)"""
+    stamp = stamps.current(user_stamp(user_id))
+    user = _cached_user(user_id, stamp)
+    if user is None:
+        user = loader()
+        if user is not None:
+            local_users.set(user_id, (stamp, pickle.dumps(user)))
+    return user
+
+
+async def aload_user(user_id, loader):
+    """load_user() for async callers; `loader` returns an awaitable"""
+    stamp = await stamps.acurrent(user_stamp(user_id))
+    user = _cached_user(user_id, stamp)
+    if user is None:
+        user = await loader()
+        if user is not None:
+            local_users.set(user_id, (stamp, pickle.dumps(user)))
+    return user
+
+
+def invalidate_cached_user(user_id):
+    """Drop the cached User/UserProfile pair here now and in every worker once the transaction commits"""
+    local_users.delete(user_id)
+    stamps.bump(user_stamp(user_id))
@@ -0,0 +1,139 @@
+import math
+from django.db.models import Prefetch
+from .cache import catalog_cache, store_key, store_tanks_key, tank_key, ACTIVE_STORES_KEY
+from .models import Store, PropaneTank, PriceOffer
+
+
+# Read-through accessors for the store/tank catalog. Results are shared
+# between requests, so treat them as read-only: never save() a cached
+# instance, re-fetch or use a queryset update() for writes instead.
+
+def get_store(store_id):
+    """Store with its owner, or None"""
+    return catalog_cache.get(
+        store_key(store_id),
+        lambda: Store.objects.select_related('owner').filter(id=store_id).first(),
+    )
+
+
+def get_store_tanks(store_id):
+    """All tanks of a store (active or not) as a list"""
+    return catalog_cache.get(
+        store_tanks_key(store_id),
+        lambda: list(PropaneTank.objects.filter(store_id=store_id).order_by('id')),
+    )
+
+
+def get_tank(tank_id):
+    """Tank with its store and store owner, or None"""
+    return catalog_cache.get(
+        tank_key(tank_id),
+        lambda: PropaneTank.objects.select_related('store__owner').filter(id=tank_id).first(),
+    )
+
+
+def load_active_stores():
+    """Active stores with owners and tanks prefetched, straight from the database"""
+    return list(
+        Store.objects.filter(is_active=True)
+        .select_related('owner')
+        .prefetch_related(Prefetch('tanks', queryset=PropaneTank.objects.order_by('id')))
+    )
+
+
+def get_active_stores():
+    """load_active_stores() through the catalog cache, as used by the map"""
+    return catalog_cache.get(ACTIVE_STORES_KEY, load_active_stores)
+
+
+def _filtered_stores(tank_type=None, max_price=None, in_stock=False):
+    if not tank_type and max_price is None and not in_stock:
+        return Store.objects.filter(is_active=True).values_list('id', flat=True)
+    # Every condition must hold for the same tank, so match tank rows
+    if in_stock:
+        # One PriceOffer per active, in-stock tank of an active store
+        tanks = PriceOffer.objects.all()
+    else:
+        tanks = PropaneTank.objects.filter(is_active=True, store__is_active=True)
+    if tank_type:
+        tanks = tanks.filter(tank_type=tank_type)
+    if max_price is not None:
+        tanks = tanks.filter(price__lte=max_price)
+    return tanks.values_list('store_id', flat=True).distinct()
+
+
+def filter_store_ids(tank_type=None, max_price=None, in_stock=False):
+    """Ids of active stores with a tank matching all of the filters"""
+    return set(_filtered_stores(tank_type, max_price, in_stock))
+
+
+# ==================== PRICE INDEX ====================
+EARTH_RADIUS_KM = 6371.0
+
+
+def distance_km(lat1, lng1, lat2, lng2):
+    """Great-circle (haversine) distance in kilometres"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _bounding_box(lat, lng, radius_km):
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    dlng = math.degrees(radius_km / (EARTH_RADIUS_KM * max(math.cos(math.radians(lat)), 1e-6)))
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng
+
+
+def cheapest_offers(lat, lng, radius_km, limit=5, tank_types=None, batch_size=50):
+    """Cheapest `limit` offers per tank type within `radius_km` of (lat, lng).
+
+    Each type is read from the (tank_type, price) index in price order,
+    pre-filtered by a bounding box and checked against the exact distance,
+    so only the rows needed to fill `limit` are ever loaded.
+    Returns {tank_type: [(offer, distance_km), ...]}.
+    """
+    min_lat, max_lat, min_lng, max_lng = _bounding_box(lat, lng, radius_km)
+    results = {}
+    for tank_type in tank_types or [value for value, _ in PropaneTank.TANK_TYPES]:
+        offers = (
+            PriceOffer.objects.filter(
+                tank_type=tank_type,
+                latitude__range=(min_lat, max_lat),
+                longitude__range=(min_lng, max_lng),
+            )
+            .select_related('store')
+            .order_by('price', 'tank_id')
+        )
+        found = []
+        start = 0
+        while len(found) < limit:
+            batch = list(offers[start:start + batch_size])
+            for offer in batch:
+                distance = distance_km(lat, lng, offer.latitude, offer.longitude)
+                if distance <= radius_km:
+                    found.append((offer, distance))
+                    if len(found) == limit:
+                        break
+            if len(batch) < batch_size:
+                break
+            start += batch_size
+        results[tank_type] = found
+    return results
+
+
+# ==================== ASYNC VARIANTS (store.async_views) ====================
+async def aget_store(store_id):
+    return await catalog_cache.aget(
+        store_key(store_id),
+        lambda: Store.objects.select_related('owner').filter(id=store_id).afirst(),
+    )
+
+
+async def aget_store_tanks(store_id):
+    async def load():
+        return [tank async for tank in PropaneTank.objects.filter(store_id=store_id).order_by('id')]
+    return await catalog_cache.aget(store_tanks_key(store_id), load)
+
+
+async def afilter_store_ids(tank_type=None, max_price=None, in_stock=False):
+    return {store_id async for store_id in _filtered_stores(tank_type, max_price, in_stock)}
@@ -0,0 +1,118 @@
+"""
+Database connection reuse and acquisition metrics.
+
+settings.DATABASES keeps each worker's connections open between requests
+(DB_CONN_MAX_AGE, checked with CONN_HEALTH_CHECKS before reuse) or, on
+PostgreSQL with DB_POOL, borrows them from a psycopg pool shared by the
+worker's threads.
+
+ConnectionMetricsMiddleware times every connect() a request triggers: a new
+connection with its TLS handshake, or a checkout from the pool. It counts
+the connects against the requests served, per worker and alias.
+/management/db-stats/ reports these counters and the pool's own statistics.
+"""
+import threading
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+
+_lock = threading.Lock()
+_requests = 0
+_aliases = {}
+
+
+def _record(alias, seconds):
+    with _lock:
+        entry = _aliases.setdefault(alias, {'connects': 0, 'connect_ms_total': 0.0, 'connect_ms_max': 0.0})
+        entry['connects'] += 1
+        entry['connect_ms_total'] += seconds * 1000
+        entry['connect_ms_max'] = max(entry['connect_ms_max'], seconds * 1000)
+
+
+def instrument(connection):
+    """Time connect() of every DatabaseWrapper of this connection's backend.
+
+    Patched on the class, so wrappers created later in other threads (one per
+    thread and alias, e.g. the per-request threads of ASGI) are timed too.
+    """
+    wrapper_class = type(connection)
+    if wrapper_class.__dict__.get('_metrics_instrumented'):
+        return
+    connect = wrapper_class.connect
+
+    def timed_connect(self):
+        started = time.perf_counter()
+        connect(self)
+        _record(self.alias, time.perf_counter() - started)
+
+    wrapper_class.connect = timed_connect
+    wrapper_class._metrics_instrumented = True
+
+
+def _pool_stats(connection):
+    pool = getattr(connection, 'pool', None)
+    if pool is None:
+        return None
+    stats = pool.get_stats()
+    checkouts, opened = stats.get('requests_num', 0), stats.get('connections_num', 0)
+    return {
+        'size': stats.get('pool_size'),
+        'available': stats.get('pool_available'),
+        'checkouts': checkouts,
+        'opened': opened,
+        'reuse_rate': round(1 - opened / checkouts, 4) if checkouts else None,
+        'waiting_ms': stats.get('requests_wait_ms', 0),
+        'timeouts': stats.get('requests_errors', 0),
+    }
+
+
+def connection_stats():
+    """Requests served and, per alias, connects and their cost since this worker started"""
+    with _lock:
+        requests = _requests
+        aliases = {alias: dict(entry) for alias, entry in _aliases.items()}
+    report = {}
+    for alias in connections:
+        connection = connections[alias]
+        entry = aliases.get(alias, {'connects': 0, 'connect_ms_total': 0.0, 'connect_ms_max': 0.0})
+        connects = entry['connects']
+        report[alias] = {
+            'vendor': connection.vendor,
+            'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+            'health_checks': connection.settings_dict['CONN_HEALTH_CHECKS'],
+            'connects': connects,
+            'connects_per_request': round(connects / requests, 4) if requests else None,
+            'connect_ms_mean': round(entry['connect_ms_total'] / connects, 2) if connects else None,
+            'connect_ms_max': round(entry['connect_ms_max'], 2),
+            'pool': _pool_stats(connection),
+        }
+    return {'requests': requests, 'databases': report}
+
+
+class ConnectionMetricsMiddleware:
+    """Count requests and time the database connects they cause"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        for alias in connections:
+            instrument(connections[alias])
+
+    def _count(self):
+        global _requests
+        with _lock:
+            _requests += 1
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        self._count()
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self._count()
+        return await self.get_response(request)
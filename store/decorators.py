@@ -1,6 +1,12 @@
+import math
 from django.shortcuts import redirect
 from django.contrib import messages
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from functools import wraps
+from .ratelimit import check_rate_limit
+from .replicas import read_from_replicas
 
 def seller_required(view_func):
     """Decorator to restrict access to approved sellers only"""
@@ -48,4 +54,57 @@ def customer_only(view_func):
             return redirect('dashboard')
         
         return view_func(request, *args, **kwargs)
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+def async_condition(etag_func):
+    """condition(etag_func=...) for async views, awaiting an async etag_func"""
+    def decorator(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            etag = await etag_func(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag is not None else None
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await view_func(request, *args, **kwargs)
+            if etag and request.method in ("GET", "HEAD"):
+                response.headers.setdefault("ETag", etag)
+            return response
+        return wrapper
+    return decorator
+
+def rate_limit(scope, user=None, ip=None, methods=None):
+    """Token-bucket limit per user and per client IP, e.g. rate_limit('reserve', user='5/m', ip='60/m')
+
+    Place it below login_required, or above seller_required/admin_required
+    so a refused request skips the role check. Anonymous requests only
+    count against the IP bucket. Only requests whose method is in
+    `methods` (all when None) are counted; refused requests get a 429 with
+    Retry-After before the view runs.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                wait = check_rate_limit(request, scope, user_rate=user, ip_rate=ip)
+                if wait:
+                    response = HttpResponse("Too many requests. Please wait a moment and try again.", status=429, content_type="text/plain")
+                    response["Retry-After"] = str(math.ceil(wait))
+                    return response
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def replica_reads(view_func):
+    """Run a GET/HEAD of a read-only view against a read replica (store.replicas)
+
+    Place it below admin_required/seller_required so the user and profile
+    are still read from the primary. Clients that wrote within
+    REPLICA_PIN_SECONDS stay on the primary.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD") or getattr(request, "pinned_to_primary", False):
+            return view_func(request, *args, **kwargs)
+        with read_from_replicas():
+            return view_func(request, *args, **kwargs)
+    return wrapper
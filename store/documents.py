@@ -0,0 +1,244 @@
+"""
+Background verification of seller application documents.
+
+apply_seller saves the uploads and calls queue_documents(), which records a
+pending SellerDocument per file and, once the transaction commits, hands
+them to a pool of DOCUMENT_WORKERS threads. Each job:
+
+- sniffs the real type from the file's leading bytes (not its extension),
+- records the size and SHA-256 checksum,
+- for images, stores the dimensions and a JPEG preview downscaled to
+  DOCUMENT_PREVIEW_SIZE pixels,
+- for PDFs, counts the pages and, when poppler's `pdftoppm` is installed,
+  renders the first page as the preview.
+
+Uploads are copied to a temporary file rather than read into memory, and
+page counting inflates at most DOCUMENT_PDF_INFLATE_LIMIT bytes per file.
+
+The admin review page shows these previews instead of the originals.
+`manage.py process_seller_documents` processes whatever a restarted worker
+left pending (and existing applications with --all).
+"""
+import hashlib
+import logging
+import mmap
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+from .models import SellerDocument
+
+logger = logging.getLogger(__name__)
+
+PDFTOPPM = shutil.which('pdftoppm')
+
+# SellerApplication file field, label, icon
+DOCUMENT_FIELDS = [
+    ('business_permit', 'Business Permit', '📋'),
+    ('dti_certificate', 'DTI Certificate', '📄'),
+    ('mayors_permit', "Mayor's Permit", '📜'),
+    ('valid_id', 'Valid ID', '🪪'),
+]
+
+SIGNATURES = [
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+]
+
+CHUNK_SIZE = 64 * 1024
+PDF_PAGE = re.compile(rb'/Type\s*/Page(?![A-Za-z])')
+PDF_STREAM = re.compile(rb'stream\r?\n(.*?)endstream', re.S)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def sniff_type(head):
+    """Content type from the first bytes of a file"""
+    # PDF readers accept the header anywhere in the first 1 KB
+    if b'%PDF-' in head[:1024]:
+        return 'application/pdf'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    for signature, content_type in SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return 'application/octet-stream'
+
+
+def pdf_page_count(data, limit=None):
+    """Number of page objects, including those inside compressed object streams.
+
+    `data` is any bytes-like object (an mmap of the file works). At most
+    `limit` bytes are inflated in total; past that the count covers only
+    the streams read so far.
+    """
+    budget = settings.DOCUMENT_PDF_INFLATE_LIMIT if limit is None else limit
+    count = len(PDF_PAGE.findall(data))
+    for match in PDF_STREAM.finditer(data):
+        if budget <= 0:
+            logger.warning("PDF inflate limit reached; page count is a lower bound")
+            break
+        inflater = zlib.decompressobj()
+        try:
+            inflated = inflater.decompress(match.group(1), budget)
+        except zlib.error:
+            continue
+        budget -= len(inflated)
+        if inflater.unconsumed_tail:
+            # The stream inflates to more than the remaining budget
+            budget = 0
+        count += len(PDF_PAGE.findall(inflated))
+    return count or None
+
+
+def _jpeg(image):
+    buffer = BytesIO()
+    image.convert('RGB').save(buffer, 'JPEG', quality=80, optimize=True)
+    return buffer.getvalue()
+
+
+def image_preview(file):
+    """(width, height, JPEG bytes of the image scaled to DOCUMENT_PREVIEW_SIZE)"""
+    with Image.open(file) as image:
+        image = ImageOps.exif_transpose(image)
+        width, height = image.size
+        image.thumbnail((settings.DOCUMENT_PREVIEW_SIZE, settings.DOCUMENT_PREVIEW_SIZE))
+        return width, height, _jpeg(image)
+
+
+def pdf_preview(source):
+    """JPEG bytes of the first page of the PDF at path `source`, or None without pdftoppm"""
+    if PDFTOPPM is None:
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        subprocess.run(
+            [PDFTOPPM, '-f', '1', '-l', '1', '-singlefile', '-jpeg',
+             '-scale-to', str(settings.DOCUMENT_PREVIEW_SIZE), source, os.path.join(tmp, 'page')],
+            check=True, capture_output=True, timeout=60,
+        )
+        with open(os.path.join(tmp, 'page.jpg'), 'rb') as f:
+            return f.read()
+
+
+def process_document(document):
+    """Fill in `document` from its file; raises if the file cannot be read or decoded"""
+    upload = getattr(document.application, document.field)
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(prefix='document-') as local:
+        # A local copy: storage backends may be remote, and pdftoppm needs a path
+        with upload.open('rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                local.write(chunk)
+                size += len(chunk)
+        local.flush()
+        local.seek(0)
+        head = local.read(1024)
+        local.seek(0)
+
+        document.size = size
+        document.checksum = digest.hexdigest()
+        document.content_type = sniff_type(head)
+        document.page_count = document.width = document.height = None
+        preview = None
+        if document.content_type == 'application/pdf':
+            with mmap.mmap(local.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                document.page_count = pdf_page_count(data)
+            preview = pdf_preview(local.name)
+        elif document.content_type.startswith('image/'):
+            document.width, document.height, preview = image_preview(local)
+    if preview is not None:
+        if document.preview:
+            document.preview.delete(save=False)
+        document.preview.save(f"{document.application_id}_{document.field}.jpg", ContentFile(preview), save=False)
+
+
+def run_document_job(document_id):
+    """Worker entry point: process one SellerDocument and record the outcome"""
+    close_old_connections()
+    try:
+        document = SellerDocument.objects.select_related('application').filter(id=document_id).first()
+        if document is None:
+            return
+        try:
+            process_document(document)
+            document.status = 'ready'
+            document.error = ''
+        except Exception as exc:
+            logger.exception("Processing %s of application %s failed", document.field, document.application_id)
+            document.status = 'failed'
+            document.error = str(exc)[:500]
+        document.processed_at = timezone.now()
+        document.save()
+    finally:
+        close_old_connections()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.DOCUMENT_WORKERS, thread_name_prefix='documents')
+        return _executor
+
+
+def submit(document_ids):
+    """Process the documents on the pool, or right here when DOCUMENT_WORKERS is 0"""
+    for document_id in document_ids:
+        if settings.DOCUMENT_WORKERS:
+            get_executor().submit(run_document_job, document_id)
+        else:
+            run_document_job(document_id)
+
+
+def record_documents(application):
+    """Create or reset a pending SellerDocument for each new or replaced upload; returns their ids"""
+    existing = {document.field: document for document in application.documents.all()}
+    queued = []
+    for field, _, _ in DOCUMENT_FIELDS:
+        upload = getattr(application, field)
+        document = existing.get(field)
+        if not upload:
+            if document is not None:
+                document.delete()
+            continue
+        if document is not None and document.source_name == upload.name and document.status != 'failed':
+            continue
+        document, _ = SellerDocument.objects.update_or_create(
+            application=application, field=field,
+            defaults={'source_name': upload.name, 'status': 'pending', 'error': ''},
+        )
+        queued.append(document.id)
+    return queued
+
+
+def queue_documents(application):
+    """record_documents() and hand the new ones to the workers once the transaction commits"""
+    queued = record_documents(application)
+    if queued:
+        transaction.on_commit(lambda: submit(queued))
+    return queued
+
+
+def document_cards(application):
+    """Label, icon, original file and SellerDocument (or None) of each uploaded file, for templates"""
+    documents = {document.field: document for document in application.documents.all()}
+    return [
+        {'label': label, 'icon': icon, 'file': getattr(application, field), 'document': documents.get(field)}
+        for field, label, icon in DOCUMENT_FIELDS
+        if getattr(application, field)
+    ]
@@ -0,0 +1,85 @@
+"""
+ETag functions for django.views.decorators.http.condition().
+
+Validators are built from ContentVersion counters plus the few request
+details the rendered page depends on, never by rendering and hashing the
+page. Returning None disables the conditional response (e.g. while flash
+messages are waiting to be shown).
+
+The `a`-prefixed variants serve the async views in store.async_views and are
+used through decorators.async_condition.
+"""
+import hashlib
+from django.contrib import messages
+from django.db.models import Q
+from .models import ContentVersion
+from .snapshot import current_snapshot_url, acurrent_snapshot_url
+
+
+def _versions_query(query):
+    return ContentVersion.objects.filter(query).order_by('name').values_list('name', 'version')
+
+
+def _etag(request, user, view_name, *parts):
+    if not user.is_authenticated or len(messages.get_messages(request)):
+        return None
+    parts = (
+        view_name,
+        user.pk,
+        user.profile.role,
+        user.profile.status,
+        request.META.get('CSRF_COOKIE', ''),
+    ) + parts
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def _map_query(user):
+    return Q(name=f"user:{user.pk}")
+
+
+def _store_detail_query(user, store_id):
+    return Q(name=f"user:{user.pk}") | Q(name=f"store:{store_id}")
+
+
+def _my_orders_query(user):
+    # Renaming a store bumps its customers' counters too (models.bump_customer_versions)
+    return Q(name=f"user:{user.pk}")
+
+
+def map_etag(request):
+    # Filtered maps embed the ids of matching stores, which any store change can alter
+    if request.GET:
+        return None
+    versions = list(_versions_query(_map_query(request.user)))
+    return _etag(request, request.user, 'map', current_snapshot_url(), versions)
+
+
+def store_detail_etag(request, store_id):
+    versions = list(_versions_query(_store_detail_query(request.user, store_id)))
+    return _etag(request, request.user, 'store_detail', versions)
+
+
+def my_orders_etag(request):
+    versions = list(_versions_query(_my_orders_query(request.user)))
+    return _etag(request, request.user, 'my_orders', versions)
+
+
+# ==================== ASYNC VARIANTS ====================
+async def amap_etag(request):
+    if request.GET:
+        return None
+    user = await request.auser()
+    versions = [v async for v in _versions_query(_map_query(user))]
+    return _etag(request, user, 'map', await acurrent_snapshot_url(), versions)
+
+
+async def astore_detail_etag(request, store_id):
+    user = await request.auser()
+    versions = [v async for v in _versions_query(_store_detail_query(user, store_id))]
+    return _etag(request, user, 'store_detail', versions)
+
+
+async def amy_orders_etag(request):
+    user = await request.auser()
+    versions = [v async for v in _versions_query(_my_orders_query(user))]
+    return _etag(request, user, 'my_orders', versions)
@@ -0,0 +1,227 @@
+"""
+Non-blocking, structured logging (configured in settings.LOGGING).
+
+BackgroundQueueHandler is the only handler loggers write to: the calling
+thread attaches the request context, applies sampling and puts the record
+on a bounded queue; a QueueListener thread formats it with JsonFormatter
+and writes it out. A full queue drops records (counted in `dropped`)
+rather than blocking a request.
+
+RequestLogMiddleware gives each request an id (from X-Request-ID or a new
+one, echoed back in the response) and records the view name; both are added
+to every record logged while the request runs, and one `store.requests`
+line per request carries the status and timings.
+
+SamplingFilter keeps a fraction of DEBUG/INFO records per logger, chosen
+per request id so a sampled request keeps all of its lines. Warnings and
+errors are always kept.
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+request_context = contextvars.ContextVar('request_context', default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, request context and extras"""
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            record.exc_text = record.exc_text or self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Copy the current request id and view name onto the record"""
+    def filter(self, record):
+        context = request_context.get()
+        if context is not None:
+            record.request_id = context['request_id']
+            if context.get('view'):
+                record.view = context['view']
+        elif hasattr(getattr(record, 'request', None), 'request_id'):
+            # django.request logs after the middleware has returned
+            record.request_id = record.request.request_id
+        return True
+
+
+def parse_sample_rates(rates):
+    """'allauth=0.1,store.requests=0.5' -> {'allauth': 0.1, 'store.requests': 0.5}"""
+    if isinstance(rates, dict):
+        return {name: float(rate) for name, rate in rates.items()}
+    parsed = {}
+    for item in (rates or '').split(','):
+        name, _, rate = item.strip().partition('=')
+        if name:
+            parsed[name] = float(rate)
+    return parsed
+
+
+class SamplingFilter(logging.Filter):
+    """Keep `rate` of the DEBUG/INFO records of each configured logger (and its children)"""
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = parse_sample_rates(rates)
+
+    def rate_for(self, name):
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition('.')[0]
+        return 1.0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            # Same decision for every record of one request and logger
+            bucket = zlib.crc32(f"{request_id}:{record.name}".encode()) / 0xFFFFFFFF
+            return bucket < rate
+        return random.random() < rate
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """QueueHandler that owns its queue and a listener thread writing JSON lines to `stream`"""
+    def __init__(self, stream=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+        self.target = logging.StreamHandler(stream)
+        self.target.setFormatter(JsonFormatter())
+        self._exception_formatter = logging.Formatter()
+        self.listener = None
+        self._start()
+        atexit.register(self._stop)
+        # A fork (e.g. gunicorn --preload) does not copy the listener thread
+        os.register_at_fork(after_in_child=self._start)
+
+    def _start(self):
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def _stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def prepare(self, record):
+        # Resolve the message and traceback here, where args and exc_info are
+        # still valid; JSON formatting happens on the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# ==================== REQUEST MIDDLEWARE ====================
+request_logger = logging.getLogger('store.requests')
+
+
+class RequestLogMiddleware:
+    """Request id and view name for every log record, and one timing line per request"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = settings.LOG_SLOW_REQUEST_MS
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _begin(self, request):
+        request_id = request.META.get('HTTP_X_REQUEST_ID', '')[:64] or uuid.uuid4().hex
+        request.request_id = request_id
+        return {'request_id': request_id, 'view': None, 'view_started': None}
+
+    def _end(self, request, response, started, context):
+        response['X-Request-ID'] = context['request_id']
+        self.log_request(request, response.status_code, started, context)
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        context = self._begin(request)
+        token = request_context.set(context)
+        try:
+            return self._end(request, self.get_response(request), started, context)
+        finally:
+            request_context.reset(token)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        context = self._begin(request)
+        token = request_context.set(context)
+        try:
+            return self._end(request, await self.get_response(request), started, context)
+        finally:
+            request_context.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        context = request_context.get()
+        if context is None:
+            return
+        match = request.resolver_match
+        context['view'] = match.view_name if match and match.view_name else view_func.__qualname__
+        context['view_started'] = time.perf_counter()
+
+    def log_request(self, request, status, started, context):
+        finished = time.perf_counter()
+        duration_ms = round((finished - started) * 1000, 1)
+        if status >= 500:
+            level = logging.ERROR
+        elif status >= 400 or duration_ms >= self.slow_ms:
+            level = logging.WARNING
+        else:
+            level = logging.INFO
+        timings = {'duration_ms': duration_ms}
+        if context['view_started'] is not None:
+            timings['view_ms'] = round((finished - context['view_started']) * 1000, 1)
+        request_logger.log(
+            level, "%s %s %s", request.method, request.path, status,
+            extra={'method': request.method, 'path': request.path, 'status': status, **timings},
+        )
@@ -0,0 +1,15 @@
+from datetime import date
+from django.core.management.base import BaseCommand
+from store.rollups import backfill
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily sales rollup from reservations (optionally for a date range)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help="First order day (YYYY-MM-DD)")
+        parser.add_argument('--end', type=date.fromisoformat, help="Last order day (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        rows = backfill(options['start'], options['end'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} sales rollup rows"))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from store.snapshot import build_catalog_snapshot
+
+
+class Command(BaseCommand):
+    help = "Write a fresh fingerprinted catalog snapshot for the customer map"
+
+    def handle(self, *args, **options):
+        name = build_catalog_snapshot()
+        self.stdout.write(self.style.SUCCESS(f"Catalog snapshot written: {name}"))
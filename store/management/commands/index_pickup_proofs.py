@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from PIL import Image
+from store.models import Reservation
+from store.proofhash import fingerprint_proof
+
+
+class Command(BaseCommand):
+    help = "Hash pickup proofs uploaded before duplicate detection (or all of them with --all)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Rehash proofs that already have a fingerprint")
+
+    def handle(self, *args, **options):
+        reservations = Reservation.objects.exclude(pickup_proof__isnull=True).exclude(pickup_proof='')
+        if not options['all']:
+            reservations = reservations.filter(proof_fingerprint__isnull=True)
+
+        hashed, failed = 0, 0
+        for reservation in reservations.iterator(chunk_size=200):
+            try:
+                fingerprint_proof(reservation)
+                hashed += 1
+            except (OSError, ValueError, Image.DecompressionBombError) as exc:
+                failed += 1
+                self.stderr.write(f"Order #{reservation.id}: {exc}")
+        self.stdout.write(self.style.SUCCESS(f"Hashed {hashed} pickup proof(s), {failed} failed"))
@@ -0,0 +1,47 @@
+import argparse
+import math
+from django.core.management.base import BaseCommand
+from store.restock import (
+    DEFAULT_COOLDOWN_HOURS, DEFAULT_HORIZON_DAYS, DEFAULT_WINDOW_DAYS, create_restock_alerts,
+)
+
+
+def at_least(minimum, cast=int):
+    """argparse type: a number no smaller than `minimum`"""
+    def parse(value):
+        try:
+            number = cast(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid number: {value!r}")
+        if not math.isfinite(number) or number < minimum:
+            raise argparse.ArgumentTypeError(f"must be at least {minimum}, got {value}")
+        return number
+    return parse
+
+
+class Command(BaseCommand):
+    help = "Forecast tank stock-outs from recent reservations and alert sellers (run e.g. hourly from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window-days', type=at_least(1), default=DEFAULT_WINDOW_DAYS,
+                            help="Days of reservations used for the depletion rate")
+        parser.add_argument('--horizon-days', type=at_least(0, float), default=DEFAULT_HORIZON_DAYS,
+                            help="Alert when a tank is expected to run out within this many days")
+        parser.add_argument('--cooldown-hours', type=at_least(0), default=DEFAULT_COOLDOWN_HOURS,
+                            help="Do not alert the same tank again within this many hours")
+        parser.add_argument('--dry-run', action='store_true', help="Print the forecast without alerting")
+
+    def handle(self, *args, **options):
+        alerted = create_restock_alerts(
+            window_days=options['window_days'],
+            horizon_days=options['horizon_days'],
+            cooldown_hours=options['cooldown_hours'],
+            dry_run=options['dry_run'],
+        )
+        for forecast in alerted:
+            self.stdout.write(
+                f"{forecast.store_name} / {forecast.tank_type}: {forecast.stock} left, "
+                f"{forecast.daily_rate}/day, {forecast.days_left} days"
+            )
+        verb = "Would alert" if options['dry_run'] else "Alerted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(alerted)} tank(s)"))
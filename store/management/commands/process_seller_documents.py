@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from store.documents import record_documents, run_document_job
+from store.models import SellerApplication, SellerDocument
+
+
+class Command(BaseCommand):
+    help = "Process seller documents left pending (e.g. by a restarted worker)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help="First record documents for applications that have none (existing uploads)")
+        parser.add_argument('--retry-failed', action='store_true', help="Also retry documents that failed")
+
+    def handle(self, *args, **options):
+        if options['all']:
+            for application in SellerApplication.objects.prefetch_related('documents').iterator(chunk_size=200):
+                record_documents(application)
+
+        statuses = ['pending', 'failed'] if options['retry_failed'] else ['pending']
+        document_ids = list(SellerDocument.objects.filter(status__in=statuses).values_list('id', flat=True))
+        for document_id in document_ids:
+            run_document_job(document_id)
+
+        failed = SellerDocument.objects.filter(id__in=document_ids, status='failed').count()
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(document_ids)} document(s), {failed} failed"))
@@ -0,0 +1,16 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from store.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete reservation idempotency keys older than --days (retries never arrive that late)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help="Keep keys this many days")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted = IdempotencyKey.objects.filter(created_at__lt=cutoff).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} idempotency keys."))
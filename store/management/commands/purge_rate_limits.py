@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from store.ratelimit import purge_shared
+
+
+class Command(BaseCommand):
+    help = "Delete idle shared rate-limit buckets (only used with RATELIMIT_SHARED)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age', type=int, default=86400,
+            help="Seconds since last use after which a bucket is dropped",
+        )
+
+    def handle(self, *args, **options):
+        deleted = purge_shared(options['max_age'])
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} idle rate-limit buckets."))
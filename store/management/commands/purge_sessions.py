@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from store.sessions import SessionStore
+
+
+class Command(BaseCommand):
+    help = "Delete expired sessions in small batches (safe to run from cron while serving traffic)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.SESSION_PURGE_BATCH_SIZE,
+            help="Rows deleted per statement",
+        )
+
+    def handle(self, *args, **options):
+        deleted = SessionStore.clear_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired sessions."))
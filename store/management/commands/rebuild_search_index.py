@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from store.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search documents for all stores and sellers"
+
+    def handle(self, *args, **options):
+        stores, sellers = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {stores} stores and {sellers} sellers"))
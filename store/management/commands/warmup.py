@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from store.warmup import import_costs, warm_up
+
+
+class Command(BaseCommand):
+    help = "Precompile templates, build the URL resolver, connect to the databases and load the proof index, reporting the cost of each"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--imports', action='store_true',
+                            help="Also report django.setup() import time per top-level package")
+        parser.add_argument('--top', type=int, default=15, help="Packages to list with --imports")
+
+    def handle(self, *args, **options):
+        report = warm_up()
+        seconds = report['seconds']
+        self.stdout.write(f"Templates: {report['templates']} compiled in {seconds['templates']:.3f}s")
+        self.stdout.write(f"Routes: {report['routes']} resolved in {seconds['routes']:.3f}s")
+        self.stdout.write(f"Databases: {', '.join(report['databases'])} connected in {seconds['databases']:.3f}s")
+        self.stdout.write(f"Pickup proof index: {report['proof_hashes']} hashes in {seconds['proof_index']:.3f}s")
+
+        if options['imports']:
+            costs = import_costs()
+            total = sum(micros for _, micros in costs)
+            self.stdout.write(f"\nImport time of django.setup(): {total / 1e6:.3f}s")
+            for package, micros in costs[:options['top']]:
+                self.stdout.write(f"  {package:<30} {micros / 1e3:9.1f} ms")
+
+        errors = report['template_errors'] + report['database_errors']
+        for error in errors:
+            self.stderr.write(error)
+        if errors:
+            raise CommandError(f"Warm-up failed for {len(errors)} item(s)")
+        self.stdout.write(self.style.SUCCESS("Warm"))
@@ -0,0 +1,69 @@
+import re
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponseForbidden
+from whitenoise.base import WhiteNoise
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class CatalogSnapshotMiddleware(WhiteNoiseMiddleware):
+    """Serve the catalog snapshots written by store.snapshot.
+
+    Snapshots appear while the process is running, so files are looked up on
+    disk per request (WhiteNoise's autorefresh mode) but only under
+    CATALOG_SNAPSHOT_URL. Fingerprinted names are cached forever; WhiteNoise
+    picks the .br/.gz variant matching Accept-Encoding.
+
+    The catalog names store owners, so snapshots are served to logged-in
+    users only, marked private and without CORS headers. The middleware must
+    come after AuthenticationMiddleware.
+    """
+    fingerprinted = re.compile(r'\.[0-9a-f]{12}\.json$')
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        WhiteNoise.__init__(
+            self,
+            application=None,
+            autorefresh=True,
+            max_age=0,
+            immutable_file_test=lambda path, url: bool(self.fingerprinted.search(url)),
+            allow_all_origins=False,
+        )
+        self.use_finders = False
+        self.static_prefix = settings.CATALOG_SNAPSHOT_URL
+        self.add_files(settings.CATALOG_SNAPSHOT_ROOT, prefix=settings.CATALOG_SNAPSHOT_URL)
+
+    def add_cache_headers(self, headers, path, url):
+        # Browser cache only: shared caches must not hand the catalog to anyone
+        super().add_cache_headers(headers, path, url)
+        if "Cache-Control" in headers:
+            headers["Cache-Control"] = headers["Cache-Control"].replace("public", "private")
+
+    def _forbidden(self):
+        return HttpResponseForbidden("Log in to load the store catalog.", content_type="text/plain")
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not request.path_info.startswith(self.static_prefix):
+            return self.get_response(request)
+        if not request.user.is_authenticated:
+            return self._forbidden()
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if not request.path_info.startswith(self.static_prefix):
+            return await self.get_response(request)
+        user = await request.auser()
+        if not user.is_authenticated:
+            return self._forbidden()
+        static_file = self.find_file(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:02
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_store_summary(apps, schema_editor):
+    Store = apps.get_model('store', 'Store')
+    PropaneTank = apps.get_model('store', 'PropaneTank')
+    for store_id in Store.objects.values_list('id', flat=True).iterator():
+        tanks = list(
+            PropaneTank.objects.filter(store_id=store_id, is_active=True)
+            .values_list('tank_type', 'price', 'stock')
+        )
+        prices = [price for _, price, _ in tanks]
+        Store.objects.filter(id=store_id).update(
+            active_tank_types=','.join(sorted(tank_type for tank_type, _, _ in tanks)),
+            min_price=min(prices) if prices else None,
+            max_price=max(prices) if prices else None,
+            total_stock=sum(stock for _, _, stock in tanks),
+            summary_updated_at=timezone.now(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_rename_payment_proof_uploaded_at_reservation_pickup_proof_uploaded_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='store',
+            name='active_tank_types',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='max_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='min_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='summary_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='total_stock',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='store',
+            index=models.Index(fields=['is_active', 'total_stock'], name='store_active_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='store',
+            index=models.Index(fields=['is_active', 'min_price'], name='store_active_price_idx'),
+        ),
+        migrations.RunPython(backfill_store_summary, migrations.RunPython.noop),
+    ]
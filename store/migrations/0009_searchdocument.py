@@ -0,0 +1,99 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:10
+
+from django.db import migrations, models
+
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE store_searchdocument ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(body, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX store_searchdocument_vector_idx ON store_searchdocument USING GIN (search_vector)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS store_searchdocument_vector_idx",
+    "ALTER TABLE store_searchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+# External-content FTS5 table kept in step with store_searchdocument by triggers
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE store_searchdocument_fts USING fts5(
+        title, body, content='store_searchdocument', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER store_searchdocument_ai AFTER INSERT ON store_searchdocument BEGIN
+        INSERT INTO store_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER store_searchdocument_ad AFTER DELETE ON store_searchdocument BEGIN
+        INSERT INTO store_searchdocument_fts(store_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER store_searchdocument_au AFTER UPDATE ON store_searchdocument BEGIN
+        INSERT INTO store_searchdocument_fts(store_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO store_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS store_searchdocument_au",
+    "DROP TRIGGER IF EXISTS store_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS store_searchdocument_ai",
+    "DROP TABLE IF EXISTS store_searchdocument_fts",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_REVERSE)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_REVERSE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_contentversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('store', 'Store'), ('seller', 'Seller')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('body', models.TextField(blank=True, default='')),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_price_offers(apps, schema_editor):
+    PropaneTank = apps.get_model('store', 'PropaneTank')
+    PriceOffer = apps.get_model('store', 'PriceOffer')
+    tanks = PropaneTank.objects.filter(is_active=True, stock__gt=0, store__is_active=True).values_list(
+        'id', 'store_id', 'tank_type', 'price', 'stock', 'store__latitude', 'store__longitude',
+    )
+    PriceOffer.objects.bulk_create(
+        [
+            PriceOffer(
+                tank_id=tank_id, store_id=store_id, tank_type=tank_type, price=price,
+                stock=stock, latitude=latitude, longitude=longitude,
+            )
+            for tank_id, store_id, tank_type, price, stock, latitude, longitude in tanks.iterator()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_searchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceOffer',
+            fields=[
+                ('tank', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='offer', serialize=False, to='store.propanetank')),
+                ('tank_type', models.CharField(choices=[('A/S Valve Gasul', 'A/S Valve Gasul'), ('POL Valve Gasul', 'POL Valve Gasul'), ('Price Gas', 'Price Gas')], max_length=50)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('stock', models.PositiveIntegerField()),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offers', to='store.store')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tank_type', 'price'], name='offer_type_price_idx'), models.Index(fields=['latitude', 'longitude'], name='offer_location_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_price_offers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0011_created_at_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('tank_type', models.CharField(choices=[('A/S Valve Gasul', 'A/S Valve Gasul'), ('POL Valve Gasul', 'POL Valve Gasul'), ('Price Gas', 'Price Gas')], max_length=50)),
+                ('orders', models.IntegerField(default=0)),
+                ('approved', models.IntegerField(default=0)),
+                ('cancelled', models.IntegerField(default=0)),
+                ('rejected', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='store.store')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['store', 'day'], name='rollup_store_day_idx')],
+                'unique_together': {('day', 'store', 'tank_type')},
+            },
+        ),
+    ]
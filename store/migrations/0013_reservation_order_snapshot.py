@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:30
+
+from django.db import migrations, models, transaction
+from django.db.models import OuterRef, Subquery
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_order_snapshot(apps, schema_editor):
+    """Copy the tank's current type and price onto existing reservations, one id range at a time"""
+    Reservation = apps.get_model('store', 'Reservation')
+    PropaneTank = apps.get_model('store', 'PropaneTank')
+    tank = PropaneTank.objects.filter(id=OuterRef('tank_id'))
+    last_id = Reservation.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    for start in range(0, last_id + 1, BACKFILL_BATCH_SIZE):
+        with transaction.atomic():
+            Reservation.objects.filter(
+                id__gte=start, id__lt=start + BACKFILL_BATCH_SIZE, unit_price__isnull=True,
+            ).update(
+                tank_type=Subquery(tank.values('tank_type')[:1]),
+                unit_price=Subquery(tank.values('price')[:1]),
+            )
+
+
+class Migration(migrations.Migration):
+    # Each backfill batch commits on its own so the table is never locked as a whole
+    atomic = False
+
+    dependencies = [
+        ('store', '0012_salesrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='quantity',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='tank_type',
+            field=models.CharField(choices=[('A/S Valve Gasul', 'A/S Valve Gasul'), ('POL Valve Gasul', 'POL Valve Gasul'), ('Price Gas', 'Price Gas')], max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='unit_price',
+            field=models.DecimalField(decimal_places=2, max_digits=8, null=True),
+        ),
+        migrations.RunPython(backfill_order_snapshot, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='reservation',
+            name='tank_type',
+            field=models.CharField(choices=[('A/S Valve Gasul', 'A/S Valve Gasul'), ('POL Valve Gasul', 'POL Valve Gasul'), ('Price Gas', 'Price Gas')], max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='reservation',
+            name='unit_price',
+            field=models.DecimalField(decimal_places=2, max_digits=8),
+        ),
+    ]
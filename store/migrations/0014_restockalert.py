@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0013_reservation_order_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RestockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.PositiveIntegerField()),
+                ('daily_rate', models.DecimalField(decimal_places=3, max_digits=10)),
+                ('days_left', models.DecimalField(decimal_places=1, max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('notification', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.notification')),
+                ('tank', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='restock_alerts', to='store.propanetank')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='restock_alert_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_outstanding(apps, schema_editor):
+    """Start each counter at the user's current pending and pending_approval orders"""
+    Reservation = apps.get_model('store', 'Reservation')
+    ReservationCounter = apps.get_model('store', 'ReservationCounter')
+    totals = (
+        Reservation.objects.filter(status__in=('pending', 'pending_approval'))
+        .values('user_id').annotate(outstanding=Count('id')).order_by()
+    )
+    ReservationCounter.objects.bulk_create(
+        [ReservationCounter(user_id=row['user_id'], outstanding=row['outstanding']) for row in totals.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('store', '0016_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reservation_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('outstanding', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_outstanding, migrations.RunPython.noop),
+    ]
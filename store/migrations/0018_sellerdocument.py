@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0017_reservationcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SellerDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=30)),
+                ('source_name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('size', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('checksum', models.CharField(blank=True, max_length=64)),
+                ('page_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('width', models.PositiveIntegerField(blank=True, null=True)),
+                ('height', models.PositiveIntegerField(blank=True, null=True)),
+                ('preview', models.ImageField(blank=True, null=True, upload_to='seller_documents/previews/')),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='documents', to='store.sellerapplication')),
+            ],
+            options={
+                'unique_together': {('application', 'field')},
+            },
+        ),
+    ]
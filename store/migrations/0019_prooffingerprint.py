@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0018_sellerdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProofFingerprint',
+            fields=[
+                ('reservation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='proof_fingerprint', serialize=False, to='store.reservation')),
+                ('dhash', models.CharField(max_length=16)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -1,9 +1,16 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Value
+from django.db.models.functions import Cast, Concat
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from datetime import timedelta
+from .cache import (
+    catalog_cache, invalidate_cached_user, invalidate_store, invalidate_tank, catalog_changed,
+    store_tanks_key, tank_key,
+)
 
 # Extend User model with profile
 class UserProfile(models.Model):
@@ -72,6 +79,38 @@ class SellerApplication(models.Model):
         return f"{self.business_name} - {self.user.username} ({self.status})"
 
 
+class SellerDocument(models.Model):
+    """What store.documents found in one uploaded file of a SellerApplication"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+
+    application = models.ForeignKey(SellerApplication, on_delete=models.CASCADE, related_name='documents')
+    # Name of the SellerApplication FileField, e.g. 'valid_id'
+    field = models.CharField(max_length=30)
+    # Storage name of the processed upload; a new upload resets the row
+    source_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField(null=True, blank=True)
+    checksum = models.CharField(max_length=64, blank=True)  # SHA-256, hex
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    preview = models.ImageField(upload_to='seller_documents/previews/', null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('application', 'field')
+
+    def __str__(self):
+        return f"{self.application_id} {self.field}: {self.status}"
+
+
 class Store(models.Model):
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="owned_stores")
     name = models.CharField(max_length=100)
@@ -81,9 +120,26 @@ class Store(models.Model):
     owner_photo = models.ImageField(upload_to='store_owners/', help_text="Upload your photo")
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    
+    # Catalog summary of the store's active tanks, kept up to date by
+    # update_store_summary() so store lists never have to walk store.tanks
+    active_tank_types = models.CharField(max_length=200, blank=True, default='')
+    min_price = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    total_stock = models.PositiveIntegerField(default=0)
+    summary_updated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'total_stock'], name='store_active_stock_idx'),
+            models.Index(fields=['is_active', 'min_price'], name='store_active_price_idx'),
+        ]
 
     def __str__(self):
         return self.name
+    
+    def active_tank_type_list(self):
+        return self.active_tank_types.split(',') if self.active_tank_types else []
 
 
 class PropaneTank(models.Model):
@@ -106,6 +162,31 @@ class PropaneTank(models.Model):
         return f"{self.tank_type} - {self.store.name}"
 
 
+class PriceOffer(models.Model):
+    """Index row for one active, in-stock tank of an active store.
+
+    Denormalizes tank type, price and store location so "cheapest X near
+    me" is a (tank_type, price) index scan. Maintained by
+    refresh_tank_offer() and refresh_price_offers(); never edit directly.
+    """
+    tank = models.OneToOneField(PropaneTank, on_delete=models.CASCADE, primary_key=True, related_name='offer')
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name='offers')
+    tank_type = models.CharField(max_length=50, choices=PropaneTank.TANK_TYPES)
+    price = models.DecimalField(max_digits=8, decimal_places=2)
+    stock = models.PositiveIntegerField()
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tank_type', 'price'], name='offer_type_price_idx'),
+            models.Index(fields=['latitude', 'longitude'], name='offer_location_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tank_type} @ {self.price} ({self.store_id})"
+
+
 class Reservation(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending Pickup'),
@@ -121,6 +202,12 @@ class Reservation(models.Model):
     name = models.CharField(max_length=100)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     
+    # What was ordered, captured at reservation time so order history shows
+    # what was actually paid even after the seller changes prices
+    tank_type = models.CharField(max_length=50, choices=PropaneTank.TANK_TYPES)
+    unit_price = models.DecimalField(max_digits=8, decimal_places=2)
+    quantity = models.PositiveIntegerField(default=1)
+    
     # Pickup proof fields (uploaded by SELLER)
     pickup_proof = models.ImageField(upload_to='pickup_proofs/', null=True, blank=True)
     pickup_proof_uploaded_at = models.DateTimeField(null=True, blank=True)
@@ -131,17 +218,41 @@ class Reservation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_notified = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Admin/reporting date ranges and the admin created_at drill-down
+            models.Index(fields=['created_at'], name='reservation_created_idx'),
+        ]
+
+    # Orders still holding stock, capped per user by MAX_PENDING_RESERVATIONS
+    OUTSTANDING_STATUSES = ('pending', 'pending_approval')
+
     def can_upload_proof(self):
         """Seller can upload pickup proof when status is pending or rejected"""
         return self.status in ['pending', 'rejected']
     
     def needs_admin_review(self):
         return self.status == 'pending_approval'
+    
+    @property
+    def total_price(self):
+        return self.unit_price * self.quantity
 
     def __str__(self):
         return f"Reservation {self.id} by {self.user.username}"
 
 
+class ProofFingerprint(models.Model):
+    """Perceptual hash of a reservation's current pickup proof, see store.proofhash"""
+    reservation = models.OneToOneField(Reservation, on_delete=models.CASCADE, primary_key=True, related_name='proof_fingerprint')
+    # 64-bit difference hash, hex
+    dhash = models.CharField(max_length=16)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.reservation_id}: {self.dhash}"
+
+
 class Notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notifications")
     message = models.TextField()
@@ -151,11 +262,259 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='notification_created_idx'),
+        ]
 
     def __str__(self):
         return f"Notification for {self.user.username}"
 
 
+class SalesRollup(models.Model):
+    """Orders per day x store x tank type, kept current by store/rollups.py.
+
+    Rows are bucketed by the day the order was placed; the status counters
+    hold how many of that day's orders are currently in each state.
+    """
+    day = models.DateField()
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name='sales_rollups')
+    tank_type = models.CharField(max_length=50, choices=PropaneTank.TANK_TYPES)
+    orders = models.IntegerField(default=0)
+    approved = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+    rejected = models.IntegerField(default=0)
+    # Value of the approved orders at the price they were placed at
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('day', 'store', 'tank_type')
+        indexes = [
+            models.Index(fields=['store', 'day'], name='rollup_store_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.store_id} {self.tank_type}"
+
+
+class RestockAlert(models.Model):
+    """Low-stock warning sent to a seller by the predict_restock job (see store/restock.py)"""
+    tank = models.ForeignKey(PropaneTank, on_delete=models.CASCADE, related_name='restock_alerts')
+    stock = models.PositiveIntegerField()
+    daily_rate = models.DecimalField(max_digits=10, decimal_places=3)
+    days_left = models.DecimalField(max_digits=10, decimal_places=1)
+    notification = models.ForeignKey(Notification, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='restock_alert_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Restock {self.tank_id}: {self.days_left} days left"
+
+
+class IdempotencyKey(models.Model):
+    """Client-chosen key of a reserve_tank submission and the reservation it created.
+
+    Replays of the same key (double taps, mobile retries) are answered with
+    the original reservation instead of placing a second order.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=64)
+    reservation = models.ForeignKey('Reservation', on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_user_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key} -> {self.reservation_id}"
+
+
+class ReservationCounter(models.Model):
+    """Number of a user's reservations in Reservation.OUTSTANDING_STATUSES.
+
+    Kept in its own row, not on UserProfile, so profile saves from a stale
+    instance never overwrite it. reserve_tank and upload_pickup_proof (for
+    a rejected order) claim a slot with claim_reservation_slot; the
+    Reservation signals release it.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='reservation_counter')
+    outstanding = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.outstanding} outstanding"
+
+
+class RateLimitBucket(models.Model):
+    """Shared token bucket for store.ratelimit when RATELIMIT_SHARED is on"""
+    key = models.CharField(max_length=200, primary_key=True)
+    tokens = models.FloatField()
+    # time.time() of the last refill
+    updated_at = models.FloatField()
+
+    def __str__(self):
+        return f"{self.key}: {self.tokens:.2f}"
+
+
+class ContentVersion(models.Model):
+    """Change counter per user or store, used to build cheap ETags"""
+    name = models.CharField(max_length=64, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class SearchDocument(models.Model):
+    """Denormalized text of a store or seller, indexed for full-text search (see store/search.py)"""
+    KIND_CHOICES = [
+        ('store', 'Store'),
+        ('seller', 'Seller'),
+    ]
+    
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True, default='')
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}: {self.title}"
+
+
+def bump_versions(*names):
+    """Increment the named counters (e.g. 'user:5', 'store:2'), creating them as needed"""
+    for name in names:
+        if ContentVersion.objects.filter(name=name).update(version=F('version') + 1):
+            continue
+        try:
+            with transaction.atomic():
+                ContentVersion.objects.create(name=name, version=1)
+        except IntegrityError:
+            ContentVersion.objects.filter(name=name).update(version=F('version') + 1)
+
+
+def update_store_summary(store_id, tank_id=None):
+    """Recompute the denormalized catalog summary of a store from its tanks.
+
+    Runs once the current transaction commits and takes no lock on the
+    store row, so orders at one store never queue behind each other. Every
+    recompute reads the committed tanks, so the latest change always ends
+    up in the summary.
+
+    Pass the id of the tank that changed to drop its cached copy as well;
+    the store's invalidation after the recompute announces both changes
+    with a single catalog_changed.
+    """
+    if tank_id is not None:
+        catalog_cache.invalidate(tank_key(tank_id), store_tanks_key(store_id))
+    transaction.on_commit(lambda: _write_store_summary(store_id))
+
+
+def _write_store_summary(store_id):
+    tanks = list(
+        PropaneTank.objects.filter(store_id=store_id, is_active=True)
+        .values_list('tank_type', 'price', 'stock')
+    )
+    prices = [price for _, price, _ in tanks]
+    updated = Store.objects.filter(id=store_id).update(
+        active_tank_types=','.join(sorted(tank_type for tank_type, _, _ in tanks)),
+        min_price=min(prices) if prices else None,
+        max_price=max(prices) if prices else None,
+        total_stock=sum(stock for _, _, stock in tanks),
+        summary_updated_at=timezone.now(),
+    )
+    if updated:
+        invalidate_store(store_id)
+
+
+def refresh_tank_offer(tank_id):
+    """Insert, update or delete the PriceOffer row of one tank"""
+    tank = (
+        PropaneTank.objects.filter(id=tank_id, is_active=True, stock__gt=0, store__is_active=True)
+        .values('store_id', 'tank_type', 'price', 'stock', 'store__latitude', 'store__longitude')
+        .first()
+    )
+    if tank is None:
+        PriceOffer.objects.filter(tank_id=tank_id).delete()
+        return
+    fields = {
+        'store_id': tank['store_id'],
+        'tank_type': tank['tank_type'],
+        'price': tank['price'],
+        'stock': tank['stock'],
+        'latitude': tank['store__latitude'],
+        'longitude': tank['store__longitude'],
+    }
+    if PriceOffer.objects.filter(tank_id=tank_id).update(**fields):
+        return
+    try:
+        with transaction.atomic():
+            PriceOffer.objects.create(tank_id=tank_id, **fields)
+    except IntegrityError:
+        # Created concurrently; ours holds the newer stock
+        PriceOffer.objects.filter(tank_id=tank_id).update(**fields)
+
+
+def refresh_price_offers(store_id):
+    """Rewrite the PriceOffer rows of one store, for changes to the store itself"""
+    with transaction.atomic():
+        PriceOffer.objects.filter(store_id=store_id).delete()
+        store = Store.objects.filter(id=store_id, is_active=True).values('latitude', 'longitude').first()
+        if store is None:
+            return
+        tanks = PropaneTank.objects.filter(store_id=store_id, is_active=True, stock__gt=0)
+        PriceOffer.objects.bulk_create([
+            PriceOffer(
+                tank_id=tank_id,
+                store_id=store_id,
+                tank_type=tank_type,
+                price=price,
+                stock=stock,
+                latitude=store['latitude'],
+                longitude=store['longitude'],
+            )
+            for tank_id, tank_type, price, stock in tanks.values_list('id', 'tank_type', 'price', 'stock')
+        ])
+
+
+def claim_reservation_slot(user_id):
+    """Count one more outstanding reservation for the user unless they are at the cap.
+
+    A single conditional UPDATE checks and increments, so concurrent orders
+    of one user cannot both take the last slot. Call it inside the
+    transaction that places the order. MAX_PENDING_RESERVATIONS = 0 counts
+    without a cap.
+    """
+    limit = settings.MAX_PENDING_RESERVATIONS
+    counters = ReservationCounter.objects.filter(user_id=user_id)
+    if limit:
+        counters = counters.filter(outstanding__lt=limit)
+    if counters.update(outstanding=F('outstanding') + 1):
+        return True
+    if ReservationCounter.objects.filter(user_id=user_id).exists():
+        return False
+    try:
+        with transaction.atomic():
+            ReservationCounter.objects.create(user_id=user_id, outstanding=1)
+        return True
+    except IntegrityError:
+        # Created by a concurrent order of the same user
+        return bool(counters.update(outstanding=F('outstanding') + 1))
+
+
+def _free_reservation_slot(user_id):
+    ReservationCounter.objects.filter(user_id=user_id, outstanding__gte=1).update(outstanding=F('outstanding') - 1)
+
+
 # Signal to create user profile automatically
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -169,13 +528,108 @@ def save_user_profile(sender, instance, **kwargs):
         instance.profile.save()
 
 
+# Signals to drop the cached User/UserProfile pair used by store.backends
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.user_id)
+
+
+# Signals to keep the store/tank catalog cache (store.catalog) fresh
+@receiver(post_save, sender=Store)
+@receiver(post_delete, sender=Store)
+def invalidate_store_cache(sender, instance, **kwargs):
+    invalidate_store(instance.pk)
+    for tank_id in PropaneTank.objects.filter(store_id=instance.pk).values_list('id', flat=True):
+        invalidate_tank(tank_id, instance.pk)
+
+
+@receiver(post_save, sender=Store)
+def refresh_store_offers(sender, instance, **kwargs):
+    # Offers copy the store's location and only exist while it is active
+    refresh_price_offers(instance.pk)
+
+
+# Signals to keep the tank's cache entry, Store's catalog summary and the tank's offer in step with its tanks
+@receiver(post_save, sender=PropaneTank)
+@receiver(post_delete, sender=PropaneTank)
+def refresh_store_summary(sender, instance, **kwargs):
+    update_store_summary(instance.store_id, instance.pk)
+
+
+@receiver(post_save, sender=PropaneTank)
+def refresh_offer(sender, instance, **kwargs):
+    refresh_tank_offer(instance.pk)
+
+
+# Signals to bump the ETag counters of the users and stores a change affects
+@receiver(catalog_changed)
+def bump_store_version(sender, store_id, **kwargs):
+    bump_versions(f"store:{store_id}")
+
+
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def bump_user_version(sender, instance, **kwargs):
+    bump_versions(f"user:{instance.user_id}")
+
+
+@receiver(post_init, sender=Store)
+def remember_store_name(sender, instance, **kwargs):
+    instance._saved_name = instance.__dict__.get('name')
+
+
+@receiver(post_save, sender=Store)
+def bump_customer_versions(sender, instance, created, **kwargs):
+    # my_orders shows the store name but its ETag reads only the customer's counter
+    if not created and instance._saved_name is not None and instance._saved_name != instance.name:
+        customers = Reservation.objects.filter(store_id=instance.pk).annotate(
+            version_name=Concat(Value('user:'), Cast('user_id', models.CharField()), output_field=models.CharField())
+        ).values('version_name')
+        ContentVersion.objects.filter(name__in=customers).update(version=F('version') + 1)
+    instance._saved_name = instance.name
+
+
+# Signals to release a user's outstanding-reservation slot when an order
+# leaves Reservation.OUTSTANDING_STATUSES. Orders entering it claim theirs with
+# claim_reservation_slot: new ones in reserve_tank, rejected ones whose proof
+# is uploaded again in upload_pickup_proof.
+@receiver(post_init, sender=Reservation)
+def remember_counted_status(sender, instance, **kwargs):
+    # Read from __dict__ so deferred loads (.only()) don't trigger a query
+    instance._counted_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Reservation)
+def update_reservation_counter(sender, instance, created, **kwargs):
+    if not created and instance._counted_status is not None:
+        was_outstanding = instance._counted_status in Reservation.OUTSTANDING_STATUSES
+        if was_outstanding and instance.status not in Reservation.OUTSTANDING_STATUSES:
+            _free_reservation_slot(instance.user_id)
+    instance._counted_status = instance.status
+
+
+@receiver(post_delete, sender=Reservation)
+def release_reservation_slot(sender, instance, **kwargs):
+    if (instance._counted_status or instance.status) in Reservation.OUTSTANDING_STATUSES:
+        _free_reservation_slot(instance.user_id)
+
+
 # Signal to notify store owner when a reservation is made
 @receiver(post_save, sender=Reservation)
 def notify_store_owner(sender, instance, created, **kwargs):
     if created and not instance.is_notified:
         Notification.objects.create(
             user=instance.store.owner,
-            message=f"🛒 New order #{instance.id}! {instance.name} purchased {instance.tank.tank_type} from {instance.store.name}. Please confirm pickup and upload proof.",
+            message=f"🛒 New order #{instance.id}! {instance.name} purchased {instance.quantity} x {instance.tank_type} from {instance.store.name}. Please confirm pickup and upload proof.",
             reservation=instance
         )
         instance.is_notified = True
@@ -0,0 +1,157 @@
+"""
+Near-duplicate detection for pickup proof photos.
+
+upload_pickup_proof stores a 64-bit difference hash (dHash) of each proof
+in ProofFingerprint. Re-encoding, resizing or light edits of a photo change
+only a few bits, so a reused photo lands within PROOF_MATCH_DISTANCE
+(Hamming distance) of the original.
+
+Each worker keeps the hashes in a BK-tree, which only visits the subtrees
+that can hold a match instead of comparing against every past proof. The
+tree is built from ProofFingerprint when the worker warms up (or on first
+search) and, before every search, picks up rows other workers saved since
+its last sync. updated_at is stamped before the saving transaction commits,
+so each sync re-reads PROOF_SYNC_OVERLAP_SECONDS before the newest stamp it
+has seen; rows already in the tree are skipped.
+"""
+import threading
+from datetime import timedelta
+from django.conf import settings
+from PIL import Image
+from .models import ProofFingerprint, Reservation
+
+HASH_SIZE = 8
+
+
+def dhash(image):
+    """64-bit difference hash of a PIL image: one bit per horizontally adjacent pixel pair"""
+    # Let JPEG decode straight to a small grayscale image
+    image.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))
+    pixels = list(image.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS).getdata())
+    value = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            left = pixels[row * (HASH_SIZE + 1) + col]
+            right = pixels[row * (HASH_SIZE + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes with Hamming distance"""
+    def __init__(self):
+        self.root = None  # [hash, items, {distance: child}]
+        self.size = 0
+
+    def add(self, value, item):
+        self.size += 1
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value, max_distance):
+        """[(distance, item)] for every item within `max_distance`, nearest first"""
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                found.extend((distance, item) for item in node[1])
+            # Triangle inequality: only children at distance d ± max_distance can match
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return sorted(found, key=lambda match: match[0])
+
+
+class ProofIndex:
+    """BK-tree of pickup proof hashes, kept in step with ProofFingerprint"""
+    def __init__(self):
+        self.tree = BKTree()
+        # reservation id -> current hash; tree entries for replaced proofs are skipped
+        self.current = {}
+        self.synced_at = None
+        self._lock = threading.Lock()
+
+    def _add(self, reservation_id, value):
+        if self.current.get(reservation_id) != value:
+            self.current[reservation_id] = value
+            self.tree.add(value, (reservation_id, value))
+
+    def sync(self):
+        """Add fingerprints saved since the last sync, less the overlap (all of them the first time)"""
+        with self._lock:
+            rows = ProofFingerprint.objects.all()
+            if self.synced_at is not None:
+                overlap = timedelta(seconds=settings.PROOF_SYNC_OVERLAP_SECONDS)
+                rows = rows.filter(updated_at__gte=self.synced_at - overlap)
+            latest = self.synced_at
+            for reservation_id, value, updated_at in rows.values_list('reservation_id', 'dhash', 'updated_at').iterator():
+                self._add(reservation_id, int(value, 16))
+                latest = max(latest, updated_at) if latest else updated_at
+            self.synced_at = latest
+            return len(self.current)
+
+    def add(self, reservation_id, value):
+        with self._lock:
+            self._add(reservation_id, value)
+
+    def search(self, value, max_distance):
+        self.sync()
+        with self._lock:
+            return [
+                (distance, reservation_id)
+                for distance, (reservation_id, stored) in self.tree.search(value, max_distance)
+                if self.current.get(reservation_id) == stored
+            ]
+
+
+proof_index = ProofIndex()
+
+
+def proof_hash(file):
+    """dHash of an image file; Image.DecompressionBombError if it has too many pixels to decode safely"""
+    with Image.open(file) as image:
+        return dhash(image)
+
+
+def fingerprint_proof(reservation, value=None):
+    """Hash the reservation's pickup proof (unless `value` is its hash), save it and add it to this worker's index"""
+    if value is None:
+        with reservation.pickup_proof.open('rb') as f:
+            value = proof_hash(f)
+    ProofFingerprint.objects.update_or_create(reservation=reservation, defaults={'dhash': f"{value:016x}"})
+    proof_index.add(reservation.id, value)
+    return value
+
+
+def similar_proofs(reservation, max_distance=None):
+    """[(distance, Reservation)] of other orders whose proof looks like this one's, closest first"""
+    fingerprint = ProofFingerprint.objects.filter(reservation=reservation).values_list('dhash', flat=True).first()
+    if fingerprint is None:
+        return []
+    if max_distance is None:
+        max_distance = settings.PROOF_MATCH_DISTANCE
+    matches = [
+        (distance, reservation_id)
+        for distance, reservation_id in proof_index.search(int(fingerprint, 16), max_distance)
+        if reservation_id != reservation.id
+    ]
+    reservations = Reservation.objects.select_related('store').in_bulk([reservation_id for _, reservation_id in matches])
+    return [(distance, reservations[reservation_id]) for distance, reservation_id in matches if reservation_id in reservations]
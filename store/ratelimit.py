@@ -0,0 +1,150 @@
+"""
+Token-bucket rate limiting for the order endpoints.
+
+Each (scope, user) and (scope, client IP) pair owns a bucket. A rate of
+"N/period" holds up to N tokens and refills at N per period; a request
+spends one token from each of its buckets and is refused with 429 when any
+of them is empty. A refused request spends nothing, so a busy IP never
+drains the buckets of the users behind it. Buckets live in a per-process
+LRU, so refusing a request costs no database work.
+
+With RATELIMIT_SHARED the requests that pass the local buckets also spend a
+token from a RateLimitBucket row per bucket, each refilled and decremented
+by a single conditional UPDATE, so the limit holds across workers. The
+UPDATEs share a transaction that is rolled back when any bucket refuses.
+
+Apply with store.decorators.rate_limit.
+"""
+import threading
+import time
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Least
+from django.db.models.lookups import GreaterThanOrEqual
+from .cache import LRUCache
+from .models import RateLimitBucket
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60): ten requests per minute"""
+    count, _, period = rate.partition('/')
+    return int(count), PERIODS[period]
+
+
+class LocalBuckets:
+    """In-process token buckets keyed by string, bounded by an LRU"""
+    def __init__(self, max_entries):
+        self.buckets = LRUCache(max_entries)
+        self._lock = threading.Lock()
+
+    def consume(self, buckets):
+        """Spend one token from every (key, capacity, refill_rate) bucket, or from none.
+
+        Returns 0 when allowed, else seconds until every bucket has a token.
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            for key, capacity, refill_rate in buckets:
+                tokens, updated = self.buckets.get(key, (capacity, now))
+                levels.append(min(capacity, tokens + (now - updated) * refill_rate))
+            wait = max(
+                [(1 - tokens) / refill_rate for tokens, (_, _, refill_rate) in zip(levels, buckets) if tokens < 1],
+                default=0,
+            )
+            spent = 0 if wait else 1
+            for tokens, (key, _, _) in zip(levels, buckets):
+                self.buckets.set(key, (tokens - spent, now))
+            return wait
+
+    def refund(self, buckets):
+        """Give back the tokens consume() spent, e.g. when the shared buckets refuse"""
+        with self._lock:
+            for key, capacity, _ in buckets:
+                entry = self.buckets.get(key)
+                if entry is not None:
+                    self.buckets.set(key, (min(capacity, entry[0] + 1), entry[1]))
+
+    def clear(self):
+        self.buckets.clear()
+
+
+local_buckets = LocalBuckets(settings.RATELIMIT_LOCAL_SIZE)
+
+
+def consume_shared(buckets):
+    """consume() against the RateLimitBucket table; one UPDATE per bucket in the common case"""
+    with transaction.atomic():
+        for key, capacity, refill_rate in buckets:
+            wait = _consume_shared_bucket(key, capacity, refill_rate)
+            if wait:
+                # Undo the tokens already spent from the other buckets
+                transaction.set_rollback(True)
+                return wait
+    return 0
+
+
+def _consume_shared_bucket(key, capacity, refill_rate):
+    now = time.time()
+    refilled = Least(
+        Value(float(capacity), output_field=FloatField()),
+        F('tokens') + (Value(now, output_field=FloatField()) - F('updated_at')) * refill_rate,
+    )
+    spent = RateLimitBucket.objects.filter(GreaterThanOrEqual(refilled, 1.0), key=key).update(
+        tokens=refilled - 1, updated_at=now,
+    )
+    if spent:
+        return 0
+    try:
+        with transaction.atomic():
+            RateLimitBucket.objects.create(key=key, tokens=capacity - 1, updated_at=now)
+        return 0
+    except IntegrityError:
+        # The bucket exists and is empty
+        bucket = RateLimitBucket.objects.filter(key=key).values_list('tokens', 'updated_at').first()
+        if bucket is None:
+            return 0
+        tokens = min(capacity, bucket[0] + (now - bucket[1]) * refill_rate)
+        return max((1 - tokens) / refill_rate, 0.001)
+
+
+def purge_shared(max_age):
+    """Delete shared buckets untouched for `max_age` seconds (they are full again anyway)"""
+    return RateLimitBucket.objects.filter(updated_at__lt=time.time() - max_age).delete()[0]
+
+
+def client_ip(request):
+    proxies = settings.RATELIMIT_TRUSTED_PROXIES
+    if proxies:
+        # Each trusted proxy appends the address it saw; the client is `proxies` from the end
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check_rate_limit(request, scope, user_rate=None, ip_rate=None):
+    """Spend a token from each applicable bucket if all have one; returns 0 or the Retry-After in seconds"""
+    if not settings.RATELIMIT_ENABLED:
+        return 0
+    rates = []
+    if user_rate and request.user.is_authenticated:
+        rates.append((f"rl:{scope}:user:{request.user.pk}", user_rate))
+    if ip_rate:
+        rates.append((f"rl:{scope}:ip:{client_ip(request)}", ip_rate))
+    buckets = []
+    for key, rate in rates:
+        count, period = parse_rate(rate)
+        buckets.append((key, count, count / period))
+    if not buckets:
+        return 0
+
+    wait = local_buckets.consume(buckets)
+    if not wait and settings.RATELIMIT_SHARED:
+        wait = consume_shared(buckets)
+        if wait:
+            local_buckets.refund(buckets)
+    return wait
@@ -0,0 +1,112 @@
+"""
+Read replicas for the admin and reporting pages.
+
+Each URL in DATABASE_REPLICA_URLS becomes a `replica_N` database.
+ReplicaRouter sends every write to `default` and sends reads there too,
+except while a view decorated with store.decorators.replica_reads runs a
+GET. The admin listings, dashboards, sales reports and exports are
+decorated. Reservation, review and other transition views are not, so
+they always read what they are about to change from the primary.
+
+Replicas lag behind the primary, so after any POST, PUT, PATCH or DELETE,
+PrimaryPinMiddleware sets a short cookie (REPLICA_PIN_SECONDS). While it
+is present the client's decorated pages read from the primary as well, and
+the page a form redirects to shows the write it just made. Reads inside
+an atomic block on `default` stay there too.
+
+Locally, point DATABASE_REPLICA_URLS at a copy of the SQLite file
+(sqlite:////path/to/replica.sqlite3) or at a second Postgres database.
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'primary_pin'
+UNSAFE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+# Replica chosen for the current read_from_replicas() block, or None outside one
+_replica = contextvars.ContextVar('replica', default=None)
+
+
+@contextmanager
+def read_from_replicas():
+    """Route the reads made inside the block to one replica (when any is configured)"""
+    # One replica for the whole block, so its queries see a single snapshot
+    # and the block pays for one connection
+    replica = _replica.get()
+    if replica is None and settings.DATABASE_REPLICAS:
+        replica = random.choice(settings.DATABASE_REPLICAS)
+    token = _replica.set(replica)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def read_alias():
+    """Database the router currently sends reads to"""
+    replica = _replica.get()
+    if replica is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    return replica
+
+
+class ReplicaRouter:
+    """Writes go to the primary; reads go to a replica only inside read_from_replicas()"""
+    def db_for_read(self, model, **hints):
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class PrimaryPinMiddleware:
+    """Keep a client on the primary for REPLICA_PIN_SECONDS after it writes"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _pin(self, request):
+        writing = request.method in UNSAFE_METHODS
+        request.pinned_to_primary = writing or PIN_COOKIE in request.COOKIES
+        return writing
+
+    def _set_pin_cookie(self, request, response):
+        response.set_cookie(
+            PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+            secure=request.is_secure(), httponly=True, samesite='Lax',
+        )
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        writing = self._pin(request)
+        response = self.get_response(request)
+        if writing:
+            self._set_pin_cookie(request, response)
+        return response
+
+    async def __acall__(self, request):
+        writing = self._pin(request)
+        response = await self.get_response(request)
+        if writing:
+            self._set_pin_cookie(request, response)
+        return response
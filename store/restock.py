@@ -0,0 +1,106 @@
+"""
+Batch low-stock prediction for the predict_restock command.
+
+One grouped query computes, for every active tank of an active store, the
+units reserved over the last `window_days` (orders that were cancelled or
+rejected gave their stock back and are ignored). From that daily depletion
+rate the job estimates the days until the tank runs out and, for tanks
+expected to run out within `horizon_days`, bulk-creates a RestockAlert and
+a Notification for the seller. Tanks alerted within `cooldown_hours` are
+skipped so sellers get one warning per day, not one per run.
+"""
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Notification, PropaneTank, RestockAlert, bump_versions
+
+DEFAULT_WINDOW_DAYS = 14
+DEFAULT_HORIZON_DAYS = 3
+DEFAULT_COOLDOWN_HOURS = 24
+
+# Orders whose stock was returned to the tank
+RETURNED_STATUSES = ('cancelled', 'rejected')
+
+
+Forecast = namedtuple('Forecast', 'tank_id store_name owner_id tank_type stock daily_rate days_left')
+
+
+def forecast_tanks(window_days=DEFAULT_WINDOW_DAYS):
+    """Depletion forecast for every active tank that sold anything in the window"""
+    if window_days < 1:
+        raise ValueError(f"window_days must be at least 1, got {window_days}")
+    since = timezone.now() - timedelta(days=window_days)
+    sold = Sum(
+        'reservation__quantity',
+        filter=Q(reservation__created_at__gte=since) & ~Q(reservation__status__in=RETURNED_STATUSES),
+    )
+    rows = (
+        PropaneTank.objects.filter(is_active=True, store__is_active=True)
+        .annotate(sold=Coalesce(sold, 0))
+        .filter(sold__gt=0)
+        .values_list('id', 'store__name', 'store__owner_id', 'tank_type', 'stock', 'sold')
+    )
+    for tank_id, store_name, owner_id, tank_type, stock, units in rows.iterator():
+        daily_rate = Decimal(units) / window_days
+        yield Forecast(
+            tank_id=tank_id,
+            store_name=store_name,
+            owner_id=owner_id,
+            tank_type=tank_type,
+            stock=stock,
+            daily_rate=daily_rate.quantize(Decimal('0.001'), ROUND_HALF_UP),
+            days_left=(stock / daily_rate).quantize(Decimal('0.1'), ROUND_HALF_UP),
+        )
+
+
+def _alert_message(forecast):
+    if forecast.stock == 0:
+        return (
+            f"📦 {forecast.tank_type} at {forecast.store_name} is out of stock. "
+            f"Customers reserved about {forecast.daily_rate:.1f} a day recently; please restock."
+        )
+    return (
+        f"📦 {forecast.tank_type} at {forecast.store_name} may run out in about "
+        f"{forecast.days_left} day(s): {forecast.stock} left, selling about {forecast.daily_rate:.1f} a day."
+    )
+
+
+def create_restock_alerts(window_days=DEFAULT_WINDOW_DAYS, horizon_days=DEFAULT_HORIZON_DAYS,
+                          cooldown_hours=DEFAULT_COOLDOWN_HOURS, dry_run=False):
+    """Run the forecast and alert sellers; returns the forecasts that were (or would be) alerted"""
+    recently_alerted = set(
+        RestockAlert.objects.filter(created_at__gte=timezone.now() - timedelta(hours=cooldown_hours))
+        .values_list('tank_id', flat=True)
+    )
+    due = [
+        forecast for forecast in forecast_tanks(window_days)
+        if forecast.days_left <= horizon_days and forecast.tank_id not in recently_alerted
+    ]
+    if dry_run or not due:
+        return due
+
+    with transaction.atomic():
+        notifications = Notification.objects.bulk_create(
+            [Notification(user_id=forecast.owner_id, message=_alert_message(forecast)) for forecast in due],
+            batch_size=500,
+        )
+        RestockAlert.objects.bulk_create(
+            [
+                RestockAlert(
+                    tank_id=forecast.tank_id,
+                    stock=forecast.stock,
+                    daily_rate=forecast.daily_rate,
+                    days_left=forecast.days_left,
+                    notification=notification,
+                )
+                for forecast, notification in zip(due, notifications)
+            ],
+            batch_size=500,
+        )
+        # bulk_create skips the post_save receivers that bump the sellers' ETag versions
+        bump_versions(*{f"user:{forecast.owner_id}" for forecast in due})
+    return due
@@ -0,0 +1,192 @@
+"""
+Daily sales rollup (SalesRollup) per day x store x tank type.
+
+Reservation saves and deletes apply their change to the row of the day the
+order was placed: new orders add to `orders`, and status transitions move
+the order between the approved/cancelled/rejected counters and in or out of
+`revenue`. Reports read these rows only and never scan Reservation.
+
+Deletes only ever update existing rows. When a store is deleted, its
+rollup rows go first in the cascade, so the subtraction for each of its
+orders finds nothing to update instead of recreating a row for a store
+that no longer exists.
+
+`manage.py backfill_sales_rollup` recomputes rows from Reservation, for
+the initial load or to repair a date range.
+"""
+from datetime import datetime, time, timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Reservation, SalesRollup
+
+# Reservation status -> SalesRollup counter
+STATUS_COUNTERS = {
+    'approved': 'approved',
+    'cancelled': 'cancelled',
+    'rejected': 'rejected',
+}
+
+
+def order_price(reservation):
+    return reservation.unit_price * reservation.quantity
+
+
+def _status_deltas(status, price, sign):
+    deltas = {}
+    counter = STATUS_COUNTERS.get(status)
+    if counter:
+        deltas[counter] = sign
+    if status == 'approved':
+        deltas['revenue'] = sign * price
+    return deltas
+
+
+def _merge(*parts):
+    merged = {}
+    for part in parts:
+        for field, delta in part.items():
+            merged[field] = merged.get(field, 0) + delta
+    return {field: delta for field, delta in merged.items() if delta}
+
+
+def _rollup_key(day, store_id, tank_type):
+    return {'day': day, 'store_id': store_id, 'tank_type': tank_type}
+
+
+def _update_rollup(key, deltas):
+    return SalesRollup.objects.filter(**key).update(**{field: F(field) + delta for field, delta in deltas.items()})
+
+
+def apply_rollup(day, store_id, tank_type, **deltas):
+    """Add `deltas` to one rollup row, creating it as needed"""
+    if not deltas:
+        return
+    key = _rollup_key(day, store_id, tank_type)
+    if _update_rollup(key, deltas):
+        return
+    try:
+        with transaction.atomic():
+            SalesRollup.objects.create(**key, **deltas)
+    except IntegrityError:
+        _update_rollup(key, deltas)
+
+
+def _reservation_key(reservation):
+    return _rollup_key(timezone.localdate(reservation.created_at), reservation.store_id, reservation.tank_type)
+
+
+def _apply_for(reservation, deltas):
+    apply_rollup(**_reservation_key(reservation), **deltas)
+
+
+# ==================== SIGNALS ====================
+@receiver(post_init, sender=Reservation)
+def remember_rollup_status(sender, instance, **kwargs):
+    # Read from __dict__ so deferred loads (.only()) don't trigger a query
+    instance._rollup_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Reservation)
+def rollup_saved_reservation(sender, instance, created, **kwargs):
+    if created:
+        _apply_for(instance, _merge({'orders': 1}, _status_deltas(instance.status, order_price(instance), 1)))
+    elif instance._rollup_status != instance.status and instance._rollup_status is not None:
+        price = order_price(instance)
+        _apply_for(instance, _merge(
+            _status_deltas(instance._rollup_status, price, -1),
+            _status_deltas(instance.status, price, 1),
+        ))
+    instance._rollup_status = instance.status
+
+
+@receiver(post_delete, sender=Reservation)
+def rollup_deleted_reservation(sender, instance, **kwargs):
+    status = instance._rollup_status or instance.status
+    deltas = _merge({'orders': -1}, _status_deltas(status, order_price(instance), -1))
+    # Update-only: a missing row was never counted or is being deleted with its store
+    _update_rollup(_reservation_key(instance), deltas)
+
+
+# ==================== BACKFILL ====================
+def backfill(start=None, end=None):
+    """Recompute rollup rows for orders placed between `start` and `end` (dates, inclusive)"""
+    reservations = Reservation.objects.all()
+    rollups = SalesRollup.objects.all()
+    if start:
+        reservations = reservations.filter(created_at__gte=timezone.make_aware(datetime.combine(start, time.min)))
+        rollups = rollups.filter(day__gte=start)
+    if end:
+        reservations = reservations.filter(created_at__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)))
+        rollups = rollups.filter(day__lte=end)
+    totals = (
+        reservations.annotate(day=TruncDate('created_at'))
+        .values('day', 'store_id', 'tank_type')
+        .annotate(
+            orders=Count('id'),
+            approved=Count('id', filter=Q(status='approved')),
+            cancelled=Count('id', filter=Q(status='cancelled')),
+            rejected=Count('id', filter=Q(status='rejected')),
+            revenue=Sum(F('unit_price') * F('quantity'), filter=Q(status='approved')),
+        )
+        .order_by()
+    )
+    with transaction.atomic():
+        rollups.delete()
+        rows = SalesRollup.objects.bulk_create(
+            [
+                SalesRollup(
+                    day=row['day'],
+                    store_id=row['store_id'],
+                    tank_type=row['tank_type'],
+                    orders=row['orders'],
+                    approved=row['approved'],
+                    cancelled=row['cancelled'],
+                    rejected=row['rejected'],
+                    revenue=row['revenue'] or 0,
+                )
+                for row in totals.iterator()
+            ],
+            batch_size=1000,
+        )
+    return len(rows)
+
+
+# ==================== REPORTS ====================
+def sales_report(rollups, days=30):
+    """Per-day and per-tank-type totals over the last `days` days, for the sales charts"""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    rollups = rollups.filter(day__gte=since).order_by()
+    sums = {
+        'orders': Sum('orders'),
+        'approved': Sum('approved'),
+        'cancelled': Sum('cancelled'),
+        'rejected': Sum('rejected'),
+        'revenue': Sum('revenue'),
+    }
+    by_day = {row['day']: row for row in rollups.values('day').annotate(**sums)}
+    daily = []
+    for offset in range(days):
+        day = since + timedelta(days=offset)
+        row = by_day.get(day, {})
+        daily.append({
+            'day': day.isoformat(),
+            'orders': row.get('orders') or 0,
+            'approved': row.get('approved') or 0,
+            'revenue': float(row.get('revenue') or 0),
+        })
+    by_type = [
+        {'tank_type': row['tank_type'], 'orders': row['orders'], 'revenue': float(row['revenue'] or 0)}
+        for row in rollups.values('tank_type').annotate(**sums).order_by('tank_type')
+    ]
+    totals = rollups.aggregate(**sums)
+    return {
+        'since': since.isoformat(),
+        'days': days,
+        'daily': daily,
+        'by_type': by_type,
+        'totals': {key: float(value or 0) if key == 'revenue' else value or 0 for key, value in totals.items()},
+    }
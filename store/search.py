@@ -0,0 +1,253 @@
+"""
+Server-side full-text search over stores and sellers.
+
+Every store and seller is flattened into one SearchDocument row (store name,
+description, owner and business name; seller username, email, business name
+and store names). Migration 0009 indexes those rows per database:
+
+- PostgreSQL: a generated, weighted `tsvector` column with a GIN index,
+  ranked with ts_rank_cd.
+- SQLite: an external-content FTS5 table kept in step by triggers, ranked
+  with bm25.
+- Anything else falls back to unranked icontains lookups.
+
+Documents are refreshed by the receivers below; `manage.py
+rebuild_search_index` rebuilds all of them.
+"""
+import re
+from django.contrib.auth.models import User
+from django.db import connections, router, transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import SearchDocument, SellerApplication, Store, UserProfile
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TERMS = 8
+
+POSTGRES_RANKED_SQL = """
+    SELECT d.id FROM store_searchdocument d, to_tsquery('simple', %s) query
+    WHERE d.search_vector @@ query AND d.kind = %s {active}
+    ORDER BY ts_rank_cd(d.search_vector, query) DESC, d.id
+    LIMIT %s OFFSET %s
+"""
+POSTGRES_COUNT_SQL = """
+    SELECT COUNT(*) FROM store_searchdocument d
+    WHERE d.search_vector @@ to_tsquery('simple', %s) AND d.kind = %s {active}
+"""
+# bm25() needs the FTS table name, not an alias; title matches weigh 10x body matches
+SQLITE_RANKED_SQL = """
+    SELECT d.id FROM store_searchdocument_fts
+    JOIN store_searchdocument d ON d.id = store_searchdocument_fts.rowid
+    WHERE store_searchdocument_fts MATCH %s AND d.kind = %s {active}
+    ORDER BY bm25(store_searchdocument_fts, 10.0, 1.0), d.id
+    LIMIT %s OFFSET %s
+"""
+SQLITE_COUNT_SQL = """
+    SELECT COUNT(*) FROM store_searchdocument_fts
+    JOIN store_searchdocument d ON d.id = store_searchdocument_fts.rowid
+    WHERE store_searchdocument_fts MATCH %s AND d.kind = %s {active}
+"""
+
+
+def tokenize(query):
+    """Split user input into at most MAX_TERMS lowercase word tokens"""
+    return TOKEN_RE.findall((query or '').lower())[:MAX_TERMS]
+
+
+def _match_expression(terms, vendor):
+    # Every term must match, each as a prefix (so "prop" finds "propane")
+    if vendor == 'postgresql':
+        return ' & '.join(f"{term}:*" for term in terms)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+class RankedResults:
+    """Lazy, sliceable search result list that works with Paginator.
+
+    Only the ids of the requested page are ranked in the database; the
+    SearchDocument rows are then fetched in one query and returned in rank
+    order.
+    """
+    def __init__(self, query, kind, active_only=True):
+        self.terms = tokenize(query)
+        self.kind = kind
+        self.active_only = active_only
+
+    def _sql(self, template):
+        return template.format(active="AND d.is_active" if self.active_only else "")
+
+    def _connection(self):
+        # Raw SQL bypasses the routers, so ask them which database to read
+        return connections[router.db_for_read(SearchDocument)]
+
+    def _fallback(self, alias):
+        docs = SearchDocument.objects.using(alias).filter(kind=self.kind)
+        if self.active_only:
+            docs = docs.filter(is_active=True)
+        for term in self.terms:
+            docs = docs.filter(Q(title__icontains=term) | Q(body__icontains=term))
+        return docs.order_by('title', 'id')
+
+    def count(self):
+        if not self.terms:
+            return 0
+        connection = self._connection()
+        if connection.vendor == 'postgresql':
+            template = POSTGRES_COUNT_SQL
+        elif connection.vendor == 'sqlite':
+            template = SQLITE_COUNT_SQL
+        else:
+            return self._fallback(connection.alias).count()
+        with connection.cursor() as cursor:
+            cursor.execute(self._sql(template), [_match_expression(self.terms, connection.vendor), self.kind])
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        if not self.terms or (index.stop is not None and index.stop <= start):
+            return []
+        connection = self._connection()
+        if connection.vendor == 'postgresql':
+            template = POSTGRES_RANKED_SQL
+        elif connection.vendor == 'sqlite':
+            template = SQLITE_RANKED_SQL
+        else:
+            return list(self._fallback(connection.alias)[index])
+        limit = index.stop - start if index.stop is not None else -1
+        if limit < 0 and connection.vendor == 'postgresql':
+            limit = None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                self._sql(template),
+                [_match_expression(self.terms, connection.vendor), self.kind, limit, start],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        docs = SearchDocument.objects.using(connection.alias).in_bulk(ids)
+        return [docs[doc_id] for doc_id in ids if doc_id in docs]
+
+
+def search_stores(query, active_only=True):
+    return RankedResults(query, 'store', active_only=active_only)
+
+
+def search_sellers(query, active_only=True):
+    return RankedResults(query, 'seller', active_only=active_only)
+
+
+# ==================== INDEXING ====================
+def _business_name(user):
+    try:
+        return user.seller_application.business_name
+    except SellerApplication.DoesNotExist:
+        return ''
+
+
+def _join(*parts):
+    return ' '.join(part for part in parts if part)
+
+
+def index_store(store_id):
+    """Create or refresh the search document of one store"""
+    store = Store.objects.select_related('owner').filter(id=store_id).first()
+    if store is None:
+        SearchDocument.objects.filter(kind='store', object_id=store_id).delete()
+        return
+    SearchDocument.objects.update_or_create(
+        kind='store',
+        object_id=store.id,
+        defaults={
+            'title': store.name,
+            'body': _join(store.description, store.owner.username, _business_name(store.owner)),
+            'is_active': store.is_active,
+        },
+    )
+
+
+def index_stores(store_ids):
+    for store_id in store_ids:
+        index_store(store_id)
+
+
+def index_seller(user_id):
+    """Create or refresh the search document of one seller (removed for non-sellers)"""
+    user = User.objects.select_related('profile').filter(id=user_id).first()
+    profile = getattr(user, 'profile', None) if user else None
+    if profile is None or profile.role != 'seller':
+        SearchDocument.objects.filter(kind='seller', object_id=user_id).delete()
+        return
+    business_name = _business_name(user)
+    store_names = Store.objects.filter(owner_id=user_id).values_list('name', flat=True)
+    SearchDocument.objects.update_or_create(
+        kind='seller',
+        object_id=user.id,
+        defaults={
+            'title': business_name or user.username,
+            'body': _join(user.username, user.email, business_name, *store_names),
+            'is_active': profile.status == 'approved',
+        },
+    )
+
+
+def index_user(user_id):
+    """Refresh everything that embeds this user's names: their seller and store documents"""
+    index_seller(user_id)
+    index_stores(Store.objects.filter(owner_id=user_id).values_list('id', flat=True))
+
+
+def rebuild_index():
+    """Rebuild all search documents; returns (stores, sellers) indexed
+
+    One transaction, so searches never see a half-empty index.
+    """
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        store_ids = list(Store.objects.values_list('id', flat=True))
+        seller_ids = list(UserProfile.objects.filter(role='seller').values_list('user_id', flat=True))
+        index_stores(store_ids)
+        for user_id in seller_ids:
+            index_seller(user_id)
+    return len(store_ids), len(seller_ids)
+
+
+# ==================== SIGNALS ====================
+@receiver(post_save, sender=Store)
+def index_saved_store(sender, instance, **kwargs):
+    index_store(instance.id)
+    # Seller documents list their store names
+    index_seller(instance.owner_id)
+
+
+@receiver(post_delete, sender=Store)
+def unindex_deleted_store(sender, instance, **kwargs):
+    SearchDocument.objects.filter(kind='store', object_id=instance.id).delete()
+    if User.objects.filter(id=instance.owner_id).exists():
+        index_seller(instance.owner_id)
+
+
+@receiver(post_save, sender=User)
+def index_saved_user(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which is not indexed
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    index_user(instance.id)
+
+
+@receiver(post_delete, sender=User)
+def unindex_deleted_user(sender, instance, **kwargs):
+    SearchDocument.objects.filter(kind='seller', object_id=instance.id).delete()
+
+
+@receiver(post_save, sender=UserProfile)
+def index_saved_profile(sender, instance, **kwargs):
+    index_seller(instance.user_id)
+
+
+@receiver(post_save, sender=SellerApplication)
+def index_saved_application(sender, instance, **kwargs):
+    index_user(instance.user_id)
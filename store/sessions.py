@@ -0,0 +1,182 @@
+"""
+Two-tier session engine: a per-process LRU in front of the database store.
+
+Enable with SESSION_ENGINE = 'store.sessions'.
+
+Each session has a version stamp (store.stamps) that every worker can read
+without a cache server. Saves and deletes replace it, and a local copy is
+served only while the stamp it was read under is still current. A logout or
+a write by another worker therefore takes effect on the next request
+everywhere, and a request costs one stamp lookup instead of a database
+query. After a save the next load reads the database once, since the new
+row cannot be tied to a stamp without racing other writers.
+
+Only sessions that carry a logged-in user are served from the local tier.
+Anonymous sessions (login, signup and social-auth flows) always read from
+the database. Local entries also expire after SESSION_LOCAL_CACHE_TIMEOUT
+seconds.
+
+Saves that would not change the stored data and would only push the expiry
+forward by less than SESSION_WRITE_INTERVAL seconds are skipped (write
+coalescing), so sliding expiry does not turn every request into an UPDATE.
+
+Expired rows are removed by `manage.py purge_sessions`, which runs on every
+deploy (build.sh) and should also run daily from cron.
+"""
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.base import CreateError, UpdateError
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.db import DatabaseError, IntegrityError, router, transaction
+from django.utils import timezone
+from . import stamps
+from .cache import LRUCache
+
+local_sessions = LRUCache(
+    settings.SESSION_LOCAL_CACHE_SIZE,
+    timeout=settings.SESSION_LOCAL_CACHE_TIMEOUT,
+)
+
+
+def session_stamp(session_key):
+    return f"session:{session_key}"
+
+
+class SessionStore(DBStore):
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # (serialized data, expire_date) as last read from or written to storage
+        self._stored = None
+
+    def _fingerprint(self, data):
+        return self.serializer().dumps(data)
+
+    def _remember(self, session_data, expire_date, data, version):
+        self._stored = (self._fingerprint(data), expire_date)
+        if version is not None and SESSION_KEY in data:
+            local_sessions.set(self.session_key, (session_data, expire_date, version))
+        else:
+            local_sessions.delete(self.session_key)
+
+    def _current_version(self):
+        if not self.session_key:
+            return None
+        return stamps.current(session_stamp(self.session_key))
+
+    async def _acurrent_version(self):
+        if not self.session_key:
+            return None
+        return await stamps.acurrent(session_stamp(self.session_key))
+
+    def _load_local(self, version):
+        if version is None:
+            return None
+        entry = local_sessions.get(self.session_key)
+        if entry is None:
+            return None
+        session_data, expire_date, local_version = entry
+        if local_version != version or expire_date <= timezone.now():
+            local_sessions.delete(self.session_key)
+            return None
+        data = self.decode(session_data)
+        self._stored = (self._fingerprint(data), expire_date)
+        return data
+
+    def load(self):
+        # Read the version first: a write landing during the query leaves the copy stale, not current
+        version = self._current_version()
+        data = self._load_local(version)
+        if data is not None:
+            return data
+        s = self._get_session_from_db()
+        if s is None:
+            return {}
+        data = self.decode(s.session_data)
+        self._remember(s.session_data, s.expire_date, data, version)
+        return data
+
+    async def aload(self):
+        version = await self._acurrent_version()
+        data = self._load_local(version)
+        if data is not None:
+            return data
+        s = await self._aget_session_from_db()
+        if s is None:
+            return {}
+        data = self.decode(s.session_data)
+        self._remember(s.session_data, s.expire_date, data, version)
+        return data
+
+    def _is_redundant(self, data, expire_date):
+        """True when storage already holds `data` and a fresh enough expiry"""
+        if self._stored is None:
+            return False
+        fingerprint, stored_expiry = self._stored
+        interval = timedelta(seconds=settings.SESSION_WRITE_INTERVAL)
+        return (
+            fingerprint == self._fingerprint(data)
+            and stored_expiry + interval >= expire_date
+        )
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        obj = self.create_model_instance(data)
+        if not must_create and self._is_redundant(data, obj.expire_date):
+            return
+        using = router.db_for_write(self.model, instance=obj)
+        try:
+            with transaction.atomic(using=using):
+                obj.save(force_insert=must_create, force_update=not must_create, using=using)
+        except IntegrityError:
+            if must_create:
+                raise CreateError
+            raise
+        except DatabaseError:
+            if not must_create:
+                raise UpdateError
+            raise
+        stamps.bump(session_stamp(self.session_key))
+        self._remember(obj.session_data, obj.expire_date, data, None)
+
+    async def asave(self, must_create=False):
+        await sync_to_async(self.save)(must_create=must_create)
+
+    def _forget(self, session_key):
+        if session_key is None or session_key == self.session_key:
+            session_key = self.session_key
+            self._stored = None
+        if session_key is not None:
+            local_sessions.delete(session_key)
+            stamps.bump(session_stamp(session_key))
+
+    def delete(self, session_key=None):
+        self._forget(session_key)
+        super().delete(session_key)
+
+    async def adelete(self, session_key=None):
+        await sync_to_async(self._forget)(session_key)
+        await super().adelete(session_key)
+
+    @classmethod
+    def clear_expired(cls, batch_size=None):
+        """Delete expired rows in primary-key batches to keep locks short"""
+        model = cls.get_model_class()
+        batch_size = batch_size or settings.SESSION_PURGE_BATCH_SIZE
+        now = timezone.now()
+        deleted = 0
+        while True:
+            keys = list(
+                model.objects.filter(expire_date__lt=now)
+                .values_list('session_key', flat=True)[:batch_size]
+            )
+            if not keys:
+                return deleted
+            deleted += model.objects.filter(session_key__in=keys).delete()[0]
+
+    @classmethod
+    async def aclear_expired(cls, batch_size=None):
+        return await sync_to_async(cls.clear_expired)(batch_size=batch_size)
@@ -0,0 +1,160 @@
+"""
+Pre-rendered catalog snapshot for the customer map.
+
+The active stores and their tanks are written to CATALOG_SNAPSHOT_ROOT as
+`catalog.<hash>.json` plus `.gz` (and `.br` when the optional `brotli`
+package is installed) and served by CatalogSnapshotMiddleware with
+immutable cache headers. The map page only embeds the URL of the current
+file, so browsing the catalog costs no ORM or template work.
+
+Any change to the catalog (see store.cache.catalog_changed) schedules one
+rebuild CATALOG_SNAPSHOT_DEBOUNCE seconds after its transaction commits;
+bursts of changes are coalesced into a single rebuild.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+from django.templatetags.static import static
+from .cache import catalog_changed
+from .catalog import load_active_stores
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = 'CURRENT'
+
+_timer = None
+_lock = threading.Lock()
+_current = (None, None)  # (mtime of CURRENT, snapshot file name)
+
+
+def catalog_payload():
+    """JSON-ready catalog in the shape the map script expects.
+
+    Read from the database rather than the catalog cache: the snapshot
+    outlives this worker's cache, so it must not capture a stale entry.
+    """
+    stores = []
+    for store in load_active_stores():
+        stores.append({
+            'id': store.id,
+            'name': store.name,
+            'lat': store.latitude,
+            'lng': store.longitude,
+            'description': store.description,
+            'owner': store.owner.username,
+            'ownerPhoto': store.owner_photo.url if store.owner_photo else static('img/default.png'),
+            'tanks': [
+                {
+                    'id': tank.id,
+                    'type': tank.tank_type,
+                    'price': float(tank.price),
+                    'stock': tank.stock,
+                    'image': static('img/11kg.png'),
+                }
+                for tank in store.tanks.all() if tank.is_active
+            ],
+        })
+    return {'stores': stores}
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def build_catalog_snapshot():
+    """Write a fingerprinted snapshot of the catalog and point CURRENT at it"""
+    root = settings.CATALOG_SNAPSHOT_ROOT
+    os.makedirs(root, exist_ok=True)
+    body = json.dumps(catalog_payload(), separators=(',', ':')).encode('utf-8')
+    name = f"catalog.{hashlib.sha256(body).hexdigest()[:12]}.json"
+    path = os.path.join(root, name)
+
+    if not os.path.exists(path):
+        # Compressed variants first, so WhiteNoise never sees the JSON without them
+        _write_atomic(path + '.gz', gzip.compress(body, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write_atomic(path + '.br', brotli.compress(body))
+        _write_atomic(path, body)
+    _write_atomic(os.path.join(root, CURRENT_FILE), name.encode('utf-8'))
+    _prune_snapshots(root, keep=name)
+    return name
+
+
+def _prune_snapshots(root, keep):
+    """Delete old snapshots, keeping the newest few for clients mid-request"""
+    snapshots = sorted(
+        (entry for entry in os.scandir(root) if entry.name.endswith('.json') and entry.name != keep),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in snapshots[settings.CATALOG_SNAPSHOT_KEEP:]:
+        for suffix in ('', '.gz', '.br'):
+            try:
+                os.remove(entry.path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+def current_snapshot_url():
+    """URL of the newest snapshot, building one if none exists yet"""
+    global _current
+    current_path = os.path.join(settings.CATALOG_SNAPSHOT_ROOT, CURRENT_FILE)
+    try:
+        mtime = os.stat(current_path).st_mtime
+    except FileNotFoundError:
+        return settings.CATALOG_SNAPSHOT_URL + build_catalog_snapshot()
+    if _current[0] != mtime:
+        with open(current_path) as f:
+            _current = (mtime, f.read().strip())
+    return settings.CATALOG_SNAPSHOT_URL + _current[1]
+
+
+async def acurrent_snapshot_url():
+    """current_snapshot_url() for async views; a first build runs in a worker thread"""
+    if not os.path.exists(os.path.join(settings.CATALOG_SNAPSHOT_ROOT, CURRENT_FILE)):
+        await sync_to_async(build_catalog_snapshot)()
+    return current_snapshot_url()
+
+
+def _rebuild():
+    global _timer
+    with _lock:
+        _timer = None
+    close_old_connections()
+    try:
+        build_catalog_snapshot()
+    except Exception:
+        logger.exception("Catalog snapshot rebuild failed")
+    finally:
+        close_old_connections()
+
+
+def schedule_catalog_snapshot():
+    """Rebuild once after the debounce delay, however many changes arrive meanwhile"""
+    global _timer
+    with _lock:
+        if _timer is not None:
+            return
+        _timer = threading.Timer(settings.CATALOG_SNAPSHOT_DEBOUNCE, _rebuild)
+        _timer.daemon = True
+        _timer.start()
+
+
+@receiver(catalog_changed)
+def catalog_snapshot_on_change(sender, **kwargs):
+    transaction.on_commit(schedule_catalog_snapshot)
@@ -0,0 +1,66 @@
+"""
+Version stamps shared by every worker, keeping per-process caches coherent.
+
+A stamp is an opaque token per name. A cache entry remembers the stamp it
+was loaded under and is served only while that stamp is still current;
+bump() replaces the stamp once the surrounding transaction commits, so every
+worker drops its copy on the next lookup. Readers must take the stamp
+before loading the row: a write that lands in between then leaves the entry
+stale, never current.
+
+Stamps are random tokens, not counters. A stamp that expired or was evicted
+is simply replaced by a fresh one, which retires every older entry too.
+
+They live in the `stamps` cache. By default that is a FileBasedCache under
+STAMP_CACHE_DIR: every worker on the host shares it without a cache server,
+and a lookup is one small file read. Deployments running on several hosts
+point STAMP_CACHE_BACKEND/STAMP_CACHE_LOCATION at a shared cache (Redis,
+Memcached) instead.
+"""
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+STAMP_CACHE_ALIAS = 'stamps'
+
+
+def stamp_cache():
+    return caches[STAMP_CACHE_ALIAS]
+
+
+def _key(name):
+    return f"stamp:{name}"
+
+
+def _new_stamp():
+    return uuid.uuid4().hex
+
+
+def current(name):
+    """The current stamp for `name`, starting a fresh one when there is none"""
+    cache = stamp_cache()
+    key = _key(name)
+    stamp = cache.get(key)
+    if stamp is None:
+        cache.add(key, _new_stamp(), settings.STAMP_TIMEOUT)
+        stamp = cache.get(key)
+    # A token nobody stored can never validate an entry
+    return stamp or _new_stamp()
+
+
+async def acurrent(name):
+    cache = stamp_cache()
+    key = _key(name)
+    stamp = await cache.aget(key)
+    if stamp is None:
+        await cache.aadd(key, _new_stamp(), settings.STAMP_TIMEOUT)
+        stamp = await cache.aget(key)
+    return stamp or _new_stamp()
+
+
+def bump(*names):
+    """Retire every entry loaded under the current stamps of `names`, once the transaction commits"""
+    def publish():
+        stamp_cache().set_many({_key(name): _new_stamp() for name in names}, settings.STAMP_TIMEOUT)
+    transaction.on_commit(publish)
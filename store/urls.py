@@ -1,6 +1,13 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Async versions of the customer read paths, for ASGI deployments
+if settings.ASYNC_CUSTOMER_VIEWS:
+    from . import async_views as read_views
+else:
+    read_views = views
+
 urlpatterns = [
     # ==================== AUTHENTICATION ====================
     path("", views.home, name="home"),
@@ -12,13 +19,15 @@ urlpatterns = [
     path("dashboard/", views.dashboard, name="dashboard"),
     
     # ==================== CUSTOMER PORTAL ====================
-    path("map/", views.map, name="map"),
-    path("my-orders/", views.my_orders, name="my_orders"),
+    path("map/", read_views.map, name="map"),
+    path("my-orders/", read_views.my_orders, name="my_orders"),
     path("orders/<int:reservation_id>/cancel/", views.cancel_order, name="cancel_order"),
-    path("store/<int:store_id>/", views.store_detail, name="store_detail"),
+    path("store/<int:store_id>/", read_views.store_detail, name="store_detail"),
     path("reserve/<int:tank_id>/", views.reserve_tank, name="reserve_tank"),
     path("receipt/<int:reservation_id>/", views.receipt, name="receipt"),
-    path("notifications/", views.notifications, name="notifications"),
+    path("notifications/", read_views.notifications, name="notifications"),
+    path("search/", views.search, name="search"),
+    path("tanks/cheapest/", views.cheapest_tanks, name="cheapest_tanks"),
     
     # ==================== SELLER APPLICATION ====================
     path("apply-seller/", views.apply_seller, name="apply_seller"),
@@ -26,6 +35,7 @@ urlpatterns = [
     
     # ==================== SELLER PORTAL ====================
     path("seller/stores/", views.my_stores, name="my_stores"),
+    path("seller/sales/", views.seller_sales, name="seller_sales"),
     path("seller/store/create/", views.create_store, name="create_store"),
     path("seller/store/<int:store_id>/manage/", views.manage_store, name="manage_store"),
     path("seller/store/<int:store_id>/delete/", views.delete_store, name="delete_store"),
@@ -51,5 +61,14 @@ urlpatterns = [
     
     # Admin - Manage Orders & Review Pickup Proofs
     path("management/orders/", views.admin_orders, name="admin_orders"),
+    path("management/orders/export/", views.admin_export_orders, name="admin_export_orders"),
+    path("management/sales/", views.admin_sales, name="admin_sales"),
     path("management/orders/<int:reservation_id>/review-pickup/", views.admin_review_pickup, name="admin_review_pickup"),
+    
+    # Admin - Cache and database connection statistics (per worker)
+    path("management/cache-stats/", views.admin_cache_stats, name="admin_cache_stats"),
+    path("management/db-stats/", views.admin_db_stats, name="admin_db_stats"),
+    
+    # Readiness probe for the platform health check
+    path("ready/", views.readiness, name="readiness"),
 ]
\ No newline at end of file
@@ -1,15 +1,37 @@
+import os
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
+from django.http import Http404, JsonResponse
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from django.contrib import messages
+from django.core.paginator import Paginator
 from django.utils import timezone
-from django.db.models import Q, Count
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Count, F, prefetch_related_objects
 from datetime import timedelta
-from .models import Store, PropaneTank, Reservation, Notification, SellerApplication, UserProfile
+from decimal import Decimal, InvalidOperation
+from PIL import Image
+from .models import Store, PropaneTank, Reservation, Notification, SellerApplication, UserProfile, SalesRollup, IdempotencyKey, update_store_summary, claim_reservation_slot, refresh_price_offers, refresh_tank_offer, bump_versions
 from .forms import StoreCreationForm, SellerApplicationForm, ApplicationReviewForm
-from .decorators import seller_required, admin_required, customer_only
+from .decorators import seller_required, admin_required, customer_only, rate_limit, replica_reads
+from .replicas import read_alias
+from .dbmetrics import connection_stats
+from .cache import catalog_cache, invalidate_store
+from .catalog import get_store, get_store_tanks, get_tank, filter_store_ids, cheapest_offers
+from .snapshot import current_snapshot_url
+from .etags import map_etag, store_detail_etag, my_orders_etag
+from .search import search_stores, search_sellers, index_stores
+from .exports import EXPORT_FORMATS, parse_export_filters, export_response
+from .rollups import sales_report
+from .warmup import ensure_warm, open_connections
+from .documents import queue_documents, document_cards
+from .proofhash import fingerprint_proof, proof_hash, similar_proofs
 
 
 # ==================== AUTHENTICATION ====================
@@ -26,7 +48,7 @@ def signup_view(request):
         form = UserCreationForm(request.POST)
         if form.is_valid():
             user = form.save()
-            login(request, user, backend='django.contrib.auth.backends.ModelBackend')
+            login(request, user, backend='store.backends.ProfileModelBackend')
             messages.success(request, f"Welcome to Propane Point, {user.username}! 🎉")
             return redirect("dashboard")
         
@@ -42,7 +64,7 @@ def login_view(request):
         form = AuthenticationForm(request, data=request.POST)
         if form.is_valid():
             user = form.get_user()
-            login(request, user, backend='django.contrib.auth.backends.ModelBackend')
+            login(request, user, backend='store.backends.ProfileModelBackend')
             messages.success(request, f"Welcome back, {user.username}! 👋")
             return redirect("dashboard")
     else:
@@ -75,22 +97,52 @@ def dashboard(request):
 
 
 # ==================== CUSTOMER PORTAL ====================
+def parse_map_filters(request):
+    """Optional map filters: ?tank_type=...&max_price=...&in_stock=1"""
+    filters = {}
+    if request.GET.get('tank_type'):
+        filters['tank_type'] = request.GET['tank_type']
+    if request.GET.get('in_stock') == '1':
+        filters['in_stock'] = True
+    try:
+        max_price = Decimal(request.GET['max_price'])
+    except (KeyError, InvalidOperation):
+        max_price = None
+    if max_price is not None and max_price.is_finite():
+        filters['max_price'] = max_price
+    return filters
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=map_etag)
 def map(request):
-    """Customer view - Browse and buy (HOMEPAGE)"""
-    stores = Store.objects.filter(is_active=True)
+    """Customer view - Browse and buy (HOMEPAGE)
+
+    Store and tank data is fetched by the page from the pre-rendered catalog
+    snapshot; this view only renders the shell and the optional filter.
+    """
+    filters = parse_map_filters(request)
+    store_filter = None
+    if filters:
+        store_filter = sorted(filter_store_ids(**filters))
+    
     unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
     
     return render(request, "customer/map.html", {
-        "stores": stores,
+        "snapshot_url": current_snapshot_url(),
+        "store_filter": store_filter,
         "unread_count": unread_count
     })
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=store_detail_etag)
 def store_detail(request, store_id):
     """Customer views store details and available tanks"""
-    store = get_object_or_404(Store, id=store_id, is_active=True)
-    tanks = store.tanks.filter(is_active=True, stock__gt=0)
+    store = get_store(store_id)
+    if store is None or not store.is_active:
+        raise Http404("Store not found")
+    tanks = [tank for tank in get_store_tanks(store_id) if tank.is_active and tank.stock > 0]
     
     unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
     
@@ -100,10 +152,105 @@ def store_detail(request, store_id):
         "unread_count": unread_count
     })
 
+@login_required
+def search(request):
+    """Ranked full-text store search (JSON), paginated with ?q=...&page=N"""
+    query = request.GET.get('q', '').strip()
+    page = Paginator(search_stores(query), 20).get_page(request.GET.get('page'))
+    stores = Store.objects.in_bulk([doc.object_id for doc in page])
+    results = []
+    for doc in page:
+        store = stores.get(doc.object_id)
+        if store is None:
+            continue
+        results.append({
+            "id": store.id,
+            "name": store.name,
+            "description": store.description,
+            "tank_types": store.active_tank_type_list(),
+            "min_price": float(store.min_price) if store.min_price is not None else None,
+            "url": reverse("store_detail", args=[store.id]),
+        })
+    return JsonResponse({
+        "query": query,
+        "page": page.number,
+        "num_pages": page.paginator.num_pages,
+        "count": page.paginator.count,
+        "results": results,
+    })
+
+@login_required
+def cheapest_tanks(request):
+    """Cheapest offers per tank type near a point (JSON)
+
+    ?lat=..&lng=..[&radius=5][&limit=5][&tank_type=...]; radius is in km.
+    """
+    try:
+        lat = float(request.GET['lat'])
+        lng = float(request.GET['lng'])
+        radius = min(float(request.GET.get('radius', 5)), 50.0)
+        limit = min(int(request.GET.get('limit', 5)), 20)
+    except (KeyError, ValueError):
+        return JsonResponse({"error": "lat and lng are required; radius and limit must be numbers"}, status=400)
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180) or radius <= 0 or limit <= 0:
+        return JsonResponse({"error": "Coordinates, radius or limit out of range"}, status=400)
+    tank_types = None
+    tank_type = request.GET.get('tank_type')
+    if tank_type:
+        if tank_type not in dict(PropaneTank.TANK_TYPES):
+            return JsonResponse({"error": "Unknown tank type"}, status=400)
+        tank_types = [tank_type]
+    
+    offers = cheapest_offers(lat, lng, radius, limit=limit, tank_types=tank_types)
+    return JsonResponse({
+        "radius_km": radius,
+        "offers": {
+            tank_type: [
+                {
+                    "tank_id": offer.tank_id,
+                    "store_id": offer.store_id,
+                    "store_name": offer.store.name,
+                    "price": float(offer.price),
+                    "stock": offer.stock,
+                    "distance_km": round(distance, 2),
+                    "url": reverse("store_detail", args=[offer.store_id]),
+                }
+                for offer, distance in found
+            ]
+            for tank_type, found in offers.items()
+        },
+    })
+
+def restore_stock(reservation):
+    """Put an order's tanks back with one UPDATE against the live row"""
+    PropaneTank.objects.filter(pk=reservation.tank_id).update(stock=F('stock') + reservation.quantity)
+    refresh_tank_offer(reservation.tank_id)
+    update_store_summary(reservation.store_id, reservation.tank_id)
+
+def reservation_idempotency_key(request):
+    return (request.POST.get('idempotency_key') or request.META.get('HTTP_IDEMPOTENCY_KEY', ''))[:64]
+
+def replayed_reservation_id(user, idempotency_key):
+    return IdempotencyKey.objects.filter(user=user, key=idempotency_key).values_list('reservation_id', flat=True).first()
+
 @login_required
 def reserve_tank(request, tank_id):
     """Customer reserves a tank"""
-    tank = get_object_or_404(PropaneTank, id=tank_id)
+    if request.method == "POST":
+        # Replayed submission (double tap, retry): answer with the original
+        # order, even once the tank sold out, and without spending a rate-limit token
+        idempotency_key = reservation_idempotency_key(request)
+        if idempotency_key:
+            original_id = replayed_reservation_id(request.user, idempotency_key)
+            if original_id:
+                return redirect("receipt", reservation_id=original_id)
+    return _reserve_tank(request, tank_id)
+
+@rate_limit('reserve', user='5/m', ip='60/m', methods=('POST',))
+def _reserve_tank(request, tank_id):
+    tank = get_tank(tank_id)
+    if tank is None:
+        raise Http404("Tank not found")
     
     if tank.stock <= 0:
         messages.error(request, "This tank is out of stock.")
@@ -116,18 +263,54 @@ def reserve_tank(request, tank_id):
             messages.error(request, "Please provide your name.")
             return redirect("store_detail", store_id=tank.store.id)
         
-        # Create reservation with 'pending' status
-        reservation = Reservation.objects.create(
-            user=request.user,
-            store=tank.store,
-            tank=tank,
-            name=name,
-            status='pending'
-        )
+        try:
+            quantity = int(request.POST.get('quantity', 1))
+        except ValueError:
+            # Rejected below along with zero and negative quantities
+            quantity = 0
+        if quantity < 1:
+            messages.error(request, "Please choose at least one tank.")
+            return redirect("store_detail", store_id=tank.store.id)
         
-        # Reduce stock
-        tank.stock -= 1
-        tank.save()
+        idempotency_key = reservation_idempotency_key(request)
+        
+        # `tank` may come from the catalog cache, so reduce stock with a
+        # conditional UPDATE against the live row instead of tank.save()
+        try:
+            with transaction.atomic():
+                # The cap check locks this user's counter row until the order commits
+                if not claim_reservation_slot(request.user.id):
+                    messages.error(request, f"You already have {settings.MAX_PENDING_RESERVATIONS} orders awaiting pickup. Pick up or cancel one before reserving again.")
+                    return redirect("my_orders")
+                reserved = PropaneTank.objects.filter(id=tank.id, stock__gte=quantity).update(stock=F('stock') - quantity)
+                if not reserved:
+                    transaction.set_rollback(True)
+                    messages.error(request, "Not enough stock for this order.")
+                    return redirect("map")
+                # Price and type as of this order, read from the row just updated
+                tank_type, unit_price = PropaneTank.objects.filter(id=tank.id).values_list('tank_type', 'price').get()
+                refresh_tank_offer(tank.id)
+                update_store_summary(tank.store_id, tank.id)
+                
+                # Create reservation with 'pending' status
+                reservation = Reservation.objects.create(
+                    user=request.user,
+                    store=tank.store,
+                    tank=tank,
+                    name=name,
+                    status='pending',
+                    tank_type=tank_type,
+                    unit_price=unit_price,
+                    quantity=quantity
+                )
+                if idempotency_key:
+                    # Unique per user: a concurrent duplicate fails here and rolls back its order
+                    IdempotencyKey.objects.create(user=request.user, key=idempotency_key, reservation=reservation)
+        except IntegrityError:
+            original_id = replayed_reservation_id(request.user, idempotency_key)
+            if not idempotency_key or not original_id:
+                raise
+            return redirect("receipt", reservation_id=original_id)
         
         messages.success(request, "Reservation created! The seller will confirm pickup and upload proof.")
         return redirect("receipt", reservation_id=reservation.id)
@@ -141,9 +324,11 @@ def receipt(request, reservation_id):
     return render(request, "receipt.html", {"reservation": reservation})
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=my_orders_etag)
 def my_orders(request):
     """Customer orders"""
-    orders = Reservation.objects.filter(user=request.user).order_by('-created_at')
+    orders = Reservation.objects.filter(user=request.user).select_related('store').order_by('-created_at')
     
     unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
     return render(request, "customer/my_orders.html", {
@@ -152,15 +337,18 @@ def my_orders(request):
     })
 
 @login_required
+@rate_limit('cancel', user='10/m', ip='60/m')
 def cancel_order(request, reservation_id):
-    reservation = get_object_or_404(Reservation, id=reservation_id, user=request.user)
+    with transaction.atomic():
+        # Locked so a double submit cannot return the stock twice
+        reservation = get_object_or_404(Reservation.objects.select_for_update(), id=reservation_id, user=request.user)
+        cancelled = reservation.status == 'pending'
+        if cancelled:
+            reservation.status = 'cancelled'
+            reservation.save()
+            restore_stock(reservation)
     
-    if reservation.status == 'pending':
-        reservation.status = 'cancelled'
-        reservation.tank.stock += 1
-        reservation.tank.save()
-        reservation.save()
-        
+    if cancelled:
         # Notify seller
         Notification.objects.create(
             user=reservation.store.owner,
@@ -179,7 +367,8 @@ def notifications(request):
     notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
     
     # Mark all as read
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    if Notification.objects.filter(user=request.user, is_read=False).update(is_read=True):
+        bump_versions(f"user:{request.user.pk}")
     
     unread_count = 0
     
@@ -216,6 +405,8 @@ def apply_seller(request):
             application.user = request.user
             application.status = 'pending'
             application.save()
+            # Type checks, checksums and previews run on the document workers
+            queue_documents(application)
             
             messages.success(request, "Application submitted! We'll review it within 2-3 business days.")
             return redirect("seller_pending")
@@ -240,7 +431,7 @@ def seller_pending(request):
 @seller_required
 def my_stores(request):
     """Seller views their stores"""
-    stores = Store.objects.filter(owner=request.user).order_by('-created_at')
+    stores = Store.objects.filter(owner=request.user).prefetch_related('tanks').order_by('-created_at')
     unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
     
     return render(request, "seller/my_stores.html", {
@@ -248,6 +439,30 @@ def my_stores(request):
         "unread_count": unread_count
     })
 
+def _report_days(request):
+    try:
+        days = int(request.GET.get('days', 30))
+    except ValueError:
+        days = 30
+    return min(max(days, 1), 366)
+
+@seller_required
+@replica_reads
+def seller_sales(request):
+    """Seller sales chart, read from the daily rollup"""
+    rollups = SalesRollup.objects.filter(store__owner=request.user)
+    store_id = request.GET.get('store')
+    if store_id and store_id.isdigit():
+        rollups = rollups.filter(store_id=int(store_id))
+    unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
+    
+    return render(request, "seller/sales.html", {
+        "report": sales_report(rollups, _report_days(request)),
+        "stores": Store.objects.filter(owner=request.user).order_by('name').only('id', 'name'),
+        "store_id": store_id,
+        "unread_count": unread_count
+    })
+
 @seller_required
 def create_store(request):
     if request.method == "POST":
@@ -337,6 +552,7 @@ def delete_store(request, store_id):
 
 
 # ==================== SELLER - Upload Pickup Proof ====================
+@rate_limit('pickup_proof', user='10/m', ip='60/m', methods=('POST',))
 @seller_required
 def upload_pickup_proof(request, reservation_id):
     """Seller uploads proof that customer picked up their order"""
@@ -370,11 +586,38 @@ def upload_pickup_proof(request, reservation_id):
             messages.error(request, "File size must be less than 5MB.")
             return redirect("upload_pickup_proof", reservation_id=reservation_id)
         
-        # Save the pickup proof
-        reservation.pickup_proof = pickup_proof
-        reservation.pickup_proof_uploaded_at = timezone.now()
-        reservation.status = 'pending_approval'
-        reservation.save()
+        # Hash the photo so admins see earlier orders with the same proof. A
+        # small file can still decode to billions of pixels; refuse those.
+        try:
+            proof_value = proof_hash(pickup_proof)
+        except Image.DecompressionBombError:
+            messages.error(request, "This image has too many pixels to process. Please upload a regular photo.")
+            return redirect("upload_pickup_proof", reservation_id=reservation_id)
+        except (OSError, ValueError):
+            proof_value = None
+        pickup_proof.seek(0)
+        
+        with transaction.atomic():
+            # Locked so racing uploads for a rejected order claim one slot between them
+            reservation = Reservation.objects.select_for_update().get(pk=reservation.pk)
+            if not reservation.can_upload_proof():
+                messages.error(request, "Cannot upload proof for this order.")
+                return redirect("manage_store", store_id=reservation.store_id)
+            # A rejected order becomes outstanding again, so it must fit under the customer's cap
+            if reservation.status == 'rejected' and not claim_reservation_slot(reservation.user_id):
+                messages.error(request, f"This customer already has {settings.MAX_PENDING_RESERVATIONS} orders awaiting pickup. The proof can be uploaded once one of them is picked up or cancelled.")
+                return redirect("manage_store", store_id=reservation.store_id)
+            
+            # Save the pickup proof
+            reservation.pickup_proof = pickup_proof
+            reservation.pickup_proof_uploaded_at = timezone.now()
+            reservation.status = 'pending_approval'
+            reservation.save()
+        
+        if proof_value is None:
+            messages.warning(request, "The photo could not be read for duplicate checks; an admin will review it manually.")
+        else:
+            fingerprint_proof(reservation, proof_value)
         
         # Notify customer
         Notification.objects.create(
@@ -395,6 +638,7 @@ def upload_pickup_proof(request, reservation_id):
 
 # ==================== ADMIN PORTAL ====================
 @admin_required
+@replica_reads
 def admin_dashboard(request):
     """Admin dashboard"""
     pending_applications = SellerApplication.objects.filter(status='pending').count()
@@ -447,7 +691,10 @@ def admin_review_application(request, application_id):
         elif decision == 'rejected':
             if not rejection_reason:
                 messages.error(request, "Please provide a rejection reason.")
-                return render(request, "admin/review_application.html", {"application": application})
+                return render(request, "admin/review_application.html", {
+                    "application": application,
+                    "documents": document_cards(application),
+                })
             
             application.status = 'rejected'
             application.rejection_reason = rejection_reason
@@ -464,9 +711,13 @@ def admin_review_application(request, application_id):
             messages.warning(request, "Application rejected and applicant notified.")
             return redirect('admin_applications')
     
-    return render(request, "admin/review_application.html", {"application": application})
+    return render(request, "admin/review_application.html", {
+        "application": application,
+        "documents": document_cards(application),
+    })
 
 @admin_required
+@replica_reads
 def admin_applications(request):
     """List all seller applications"""
     status_filter = request.GET.get('status', 'all')
@@ -489,16 +740,30 @@ def admin_applications(request):
     })
 
 @admin_required
+@replica_reads
 def admin_sellers(request):
-    """Manage all sellers"""
-    sellers = UserProfile.objects.filter(role='seller', status='approved')
+    """Manage all sellers (server-side search with ?q=...)"""
+    query = request.GET.get('q', '').strip()
+    sellers = UserProfile.objects.filter(role='seller', status='approved').select_related('user')
+    if query:
+        page = Paginator(search_sellers(query), 25).get_page(request.GET.get('page'))
+        ranked_ids = [doc.object_id for doc in page]
+        by_user = {profile.user_id: profile for profile in sellers.filter(user_id__in=ranked_ids)}
+        page.object_list = [by_user[user_id] for user_id in ranked_ids if user_id in by_user]
+    else:
+        page = Paginator(sellers.order_by('user__username'), 25).get_page(request.GET.get('page'))
+        page.object_list = list(page.object_list)
+    prefetch_related_objects(page.object_list, 'user__owned_stores')
     
     context = {
-        "sellers": sellers
+        "sellers": page.object_list,
+        "page_obj": page,
+        "query": query,
     }
     return render(request, "admin/sellers.html", context)
 
 @admin_required
+@replica_reads
 def admin_stores(request):
     """View and manage all stores"""
     stores = Store.objects.all().order_by('-created_at')
@@ -517,6 +782,16 @@ def admin_toggle_store(request, store_id):
     
     return redirect('admin_stores')
 
+@admin_required
+def admin_cache_stats(request):
+    """Hit/miss counters of this worker's catalog cache, for tuning its size"""
+    return JsonResponse({"pid": os.getpid(), "catalog": catalog_cache.stats()})
+
+@admin_required
+def admin_db_stats(request):
+    """Connection reuse and acquisition time of this worker, for tuning DB_CONN_MAX_AGE and DB_POOL"""
+    return JsonResponse({"pid": os.getpid(), **connection_stats()})
+
 @admin_required
 def admin_suspend_seller(request, user_id):
     """Suspend a seller account"""
@@ -529,7 +804,12 @@ def admin_suspend_seller(request, user_id):
             profile.save()
             
             # Deactivate all stores
-            Store.objects.filter(owner=user).update(is_active=False)
+            store_ids = list(Store.objects.filter(owner=user).values_list('id', flat=True))
+            Store.objects.filter(id__in=store_ids).update(is_active=False)
+            for store_id in store_ids:
+                refresh_price_offers(store_id)
+                invalidate_store(store_id)
+            index_stores(store_ids)
             
             Notification.objects.create(
                 user=user,
@@ -548,9 +828,14 @@ def admin_suspend_seller(request, user_id):
 
 # ==================== ADMIN - Review Pickup Proof ====================
 @admin_required
+@transaction.atomic
 def admin_review_pickup(request, reservation_id):
     """Admin reviews pickup proof submitted by seller"""
-    reservation = get_object_or_404(Reservation, id=reservation_id)
+    reservations = Reservation.objects.all()
+    if request.method == "POST":
+        # Locked so concurrent reviews cannot both restore stock or adjust the ReservationCounter
+        reservations = reservations.select_for_update()
+    reservation = get_object_or_404(reservations, id=reservation_id)
     
     if reservation.status != 'pending_approval':
         messages.error(request, "This order is not pending review.")
@@ -584,7 +869,10 @@ def admin_review_pickup(request, reservation_id):
         elif decision == 'rejected':
             if not rejection_reason:
                 messages.error(request, "Please provide a rejection reason.")
-                return render(request, "admin/review_pickup.html", {"reservation": reservation})
+                return render(request, "admin/review_pickup.html", {
+                    "reservation": reservation,
+                    "similar_proofs": similar_proofs(reservation),
+                })
             
             reservation.status = 'rejected'
             reservation.rejection_reason = rejection_reason
@@ -592,9 +880,7 @@ def admin_review_pickup(request, reservation_id):
             reservation.reviewed_at = timezone.now()
             reservation.save()
             
-            # Return stock
-            reservation.tank.stock += 1
-            reservation.tank.save()
+            restore_stock(reservation)
             
             # Notify seller
             Notification.objects.create(
@@ -611,10 +897,22 @@ def admin_review_pickup(request, reservation_id):
             messages.warning(request, "Pickup proof rejected. Seller and customer notified.")
             return redirect('admin_orders')
     
-    return render(request, "admin/review_pickup.html", {"reservation": reservation})
+    return render(request, "admin/review_pickup.html", {
+        "reservation": reservation,
+        "similar_proofs": similar_proofs(reservation),
+    })
+
 
+@admin_required
+@replica_reads
+def admin_sales(request):
+    """Marketplace-wide sales chart, read from the daily rollup"""
+    return render(request, "admin/sales.html", {
+        "report": sales_report(SalesRollup.objects.all(), _report_days(request)),
+    })
 
 @admin_required
+@replica_reads
 def admin_orders(request):
     """View all orders/reservations"""
     status_filter = request.GET.get('status', 'all')
@@ -629,5 +927,35 @@ def admin_orders(request):
     return render(request, "admin/orders.html", {
         "orders": orders,
         "status_filter": status_filter,
-        "pending_review_count": pending_review_count
+        "pending_review_count": pending_review_count,
+        "stores": Store.objects.order_by('name').only('id', 'name'),
     })
+
+@admin_required
+@replica_reads
+def admin_export_orders(request):
+    """Stream orders as CSV or JSON Lines (?format=csv|jsonl&start=&end=&store=&status=)"""
+    export_format = request.GET.get('format', 'csv')
+    try:
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown format: {export_format}")
+        filters = parse_export_filters(request.GET)
+    except ValueError as e:
+        messages.error(request, f"Invalid export filter: {e}")
+        return redirect('admin_orders')
+    # The rows are read after the view returns, so pin the stream to this request's database
+    return export_response(filters, export_format, using=read_alias())
+
+
+# ==================== HEALTH ====================
+def readiness(request):
+    """Readiness probe: 200 once this worker is warm and can reach its databases, else 503"""
+    report = ensure_warm()
+    database_errors = open_connections()
+    ready = report['ok'] and not database_errors
+    return JsonResponse({
+        "ready": ready,
+        "templates": report['templates'],
+        "routes": report['routes'],
+        "seconds": report['seconds'],
+    }, status=200 if ready else 503)
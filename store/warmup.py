@@ -0,0 +1,196 @@
+"""
+Cold-start warm-up for sleeping instances.
+
+warm_up() does the work the first requests after a wake would otherwise pay
+for: it compiles every template under the TEMPLATES dirs into the cached
+loader, imports every URLconf (admin, allauth and its providers) and builds
+the resolver's reverse maps, opens each database connection and loads the
+pickup proof index (store.proofhash). The connections stay open, so the
+first requests do not pay for the connect.
+
+A worker forked from a warmed master (gunicorn --preload) must not use the
+master's sockets. After a fork the child forgets the inherited connections
+without closing them, since close() would end the master's session on the
+shared socket, and opens its own before it accepts traffic.
+
+It runs in the process that will serve traffic: propane_exchange.wsgi and
+.asgi call it as each worker loads when WARMUP_ON_START is set, and the
+/ready/ probe runs it on first use otherwise. `manage.py warmup` runs the
+same steps and prints their cost, plus an import-time breakdown of
+django.setup() with --imports.
+"""
+import logging
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import URLResolver, get_resolver
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_report = None
+# Inherited from the parent process; kept referenced so they are never closed here
+_inherited = []
+
+
+def compile_templates():
+    """Load every project template through the engines so the cached loader keeps it"""
+    compiled, failed = 0, []
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for directory in engine.engine.dirs:
+            root = Path(directory)
+            for path in sorted(root.rglob('*.html')):
+                name = path.relative_to(root).as_posix()
+                try:
+                    engine.get_template(name)
+                    compiled += 1
+                except Exception as exc:
+                    failed.append(f"{name}: {exc}")
+    return compiled, failed
+
+
+def _walk(resolver):
+    count = 0
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            count += _walk(pattern)
+        else:
+            count += 1
+    # Builds the reverse, namespace and app maps of this level
+    resolver.reverse_dict
+    return count
+
+
+def resolve_routes():
+    """Import every URLconf and populate the resolver's lookup tables; returns the route count"""
+    return _walk(get_resolver())
+
+
+def open_connections():
+    """Connect to each configured database; returns the aliases that failed"""
+    failed = []
+    for alias in connections:
+        try:
+            connections[alias].ensure_connection()
+        except Exception as exc:
+            failed.append(f"{alias}: {exc}")
+    return failed
+
+
+def reopen_after_fork():
+    """Drop the connections inherited from the parent process and open this process's own"""
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is not None:
+            _inherited.append(connection.connection)
+            connection.connection = None
+        pools = getattr(type(connection), '_connection_pools', None)
+        if pools and connection.alias in pools:
+            _inherited.append(pools.pop(connection.alias))
+    failed = open_connections()
+    for error in failed:
+        logger.error("Reconnect after fork failed for %s", error)
+
+
+def close_connections():
+    """Close this process's database connections and connection pools"""
+    for connection in connections.all(initialized_only=True):
+        if connection.in_atomic_block:
+            # Closing would break the caller's transaction (e.g. a test case)
+            continue
+        connection.close()
+        close_pool = getattr(connection, 'close_pool', None)
+        if close_pool is not None:
+            close_pool()
+
+
+def load_proof_index():
+    """Build this worker's pickup proof BK-tree; returns the number of hashes"""
+    from .proofhash import proof_index
+    return proof_index.sync()
+
+
+def _timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def warm_up():
+    """Run every warm-up step and return a report of counts, failures and seconds"""
+    (templates, template_errors), template_seconds = _timed(compile_templates)
+    routes, route_seconds = _timed(resolve_routes)
+    db_errors, db_seconds = _timed(open_connections)
+    proof_hashes, proof_seconds = _timed(load_proof_index) if not db_errors else (0, 0.0)
+    return {
+        'pid': os.getpid(),
+        'templates': templates,
+        'template_errors': template_errors,
+        'routes': routes,
+        'databases': list(connections),
+        'database_errors': db_errors,
+        'proof_hashes': proof_hashes,
+        'seconds': {
+            'templates': round(template_seconds, 4),
+            'routes': round(route_seconds, 4),
+            'databases': round(db_seconds, 4),
+            'proof_index': round(proof_seconds, 4),
+        },
+        'ok': not template_errors and not db_errors,
+    }
+
+
+def ensure_warm(setup_seconds=None):
+    """warm_up() once per process; later calls return the first report"""
+    global _report
+    with _lock:
+        if _report is None:
+            _report = warm_up()
+            os.register_at_fork(after_in_child=reopen_after_fork)
+            if setup_seconds is not None:
+                _report['seconds']['setup'] = round(setup_seconds, 4)
+            logger.info(
+                "Warm-up: %d templates, %d routes, %d database(s) in %s",
+                _report['templates'], _report['routes'], len(_report['databases']), _report['seconds'],
+            )
+            for error in _report['template_errors'] + _report['database_errors']:
+                logger.error("Warm-up failed for %s", error)
+        return _report
+
+
+def is_warm():
+    return _report is not None
+
+
+# ==================== IMPORT COST ====================
+_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def import_costs(settings_module=None):
+    """Cumulative import time of django.setup() per top-level package, in microseconds.
+
+    Runs a fresh interpreter with -X importtime, since this process has
+    already imported everything.
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module or os.environ['DJANGO_SETTINGS_MODULE'])
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import django; django.setup()'],
+        env=env, cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+    )
+    totals = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        # One leading space marks a module imported at the top level
+        if match and len(match.group(3)) == 1:
+            package = match.group(4).split('.')[0]
+            totals[package] = totals.get(package, 0) + int(match.group(2))
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)